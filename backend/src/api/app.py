@@ -1,36 +1,54 @@
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 import psycopg2
 import os
 import json
-from datetime import datetime, timedelta
+import base64
+import re
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+from cache import ResponseCache, TTLCache
+from db import ConnectionPool
+from downsample import lttb
+from http_cache import apply_cache_headers, is_not_modified, make_etag, not_modified_response
+
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+db_pool = ConnectionPool.from_env()
+
 def get_db_connection():
-    """Establish database connection"""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            database=os.getenv("DB_NAME", "steam_prices"),
-            user=os.getenv("DB_USER", "steam_user"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432")
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+    """Check out a pooled database connection for the current request"""
+    if 'db_conn' not in g:
+        try:
+            g.db_conn = db_pool.getconn()
+        except Exception as e:
+            print(f"Database connection failed: {e}")
+            return None
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Return the request's connection to the pool, even if the route raised"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.putconn(conn)
 
-def calculate_price_grade(current_price, historical_low, discount_percent):
+def calculate_price_grade(current_price, historical_low, discount_percent, all_time_low=None):
     """Calculate price grade based on current price vs historical low and discount"""
     if current_price == 0:
         return "A+"
     
+    # Matching the best price ever seen beats any 90-day comparison
+    if all_time_low and current_price <= all_time_low:
+        return "A+"
+    
+    if not historical_low and all_time_low:
+        historical_low = all_time_low
+    
     if current_price <= historical_low:
         return "A+"
     
@@ -62,12 +80,75 @@ def parse_json_field(field):
             return []
     return field if isinstance(field, (list, dict)) else []
 
+# The batch outlook's forecast label where forecast_job.py has run, else the
+# ingest-time comparison stored with the current price
+FORECAST_EXPR = "COALESCE(pf.forecast, lp.forecast)"
+
+# Columns expected by transform_game_data_from_row. Queries alias the latest
+# price as lp, the matching price_stats row as ps and its batch outlook
+# (price_forecasts) as pf.
+GAME_COLUMNS = f"""
+    g.app_id, g.name, g.short_description, g.header_image_url, g.release_date,
+    g.metacritic_score, g.recommendation_count,
+    g.platform_windows, g.platform_mac, g.platform_linux,
+    g.genres, g.publishers, g.developers,
+    lp.currency, lp.initial_price, lp.final_price, lp.discount_percent, lp.checked_at,
+    ps.low_90d, ps.all_time_low, ps.all_time_high,
+    ps.price_sum::float8 / NULLIF(ps.observation_count, 0) AS average_price,
+    ps.last_discount_at, lp.price_grade, {FORECAST_EXPR} AS forecast,
+    pf.drop_probability, pf.trend_pct_per_week, pf.sale_interval_days,
+    pf.expected_sale_in_days, pf.computed_at
+"""
+GAME_COLUMN_COUNT = 30
+
+# Latest price snapshot (lp), its statistics (ps) and outlook (pf) for each game row g,
+# optionally restricted to one currency (see price_joins)
+PRICE_JOINS = """
+    LEFT JOIN LATERAL (
+        SELECT currency, initial_price, final_price, discount_percent, checked_at, price_grade, forecast
+        FROM current_prices cp
+        WHERE cp.app_id = g.app_id {currency_filter}
+        ORDER BY cp.checked_at DESC
+        LIMIT 1
+    ) lp ON TRUE
+    LEFT JOIN price_stats ps ON ps.app_id = g.app_id AND ps.currency = lp.currency
+    LEFT JOIN price_forecasts pf ON pf.app_id = g.app_id AND pf.currency = lp.currency
+"""
+
+def price_joins(currency):
+    """
+    PRICE_JOINS for one currency, or for each game's latest price in any.
+    
+    Returns:
+        tuple: (SQL fragment, list of parameters)
+    """
+    if currency:
+        # (app_id, currency) is the primary key: still a single-row lookup
+        return PRICE_JOINS.format(currency_filter="AND cp.currency = %s"), [currency]
+    return PRICE_JOINS.format(currency_filter=""), []
+
+# price_history rows are intervals (first seen at checked_at, still seen at
+# last_seen_at). Charts get a point at each end, or one point when both are
+# the same observation. Expects the interval rows aliased as h.
+HISTORY_POINTS = """
+    CROSS JOIN LATERAL (
+        VALUES (h.checked_at), (NULLIF(h.last_seen_at, h.checked_at))
+    ) AS p(observed_at)
+"""
+
+def format_cents(value):
+    """Convert a price in cents to currency units, keeping None as None"""
+    return value / 100.0 if value is not None else None
+
 def transform_game_data_from_row(row):
     """Transform database row from optimized query to frontend format"""
     (app_id, name, short_description, header_image_url, release_date, metacritic_score,
      recommendation_count, platform_windows, platform_mac, platform_linux,
      genres, publishers, developers, currency, initial_price, final_price, 
-     discount_percent, checked_at, lowest_price) = row
+     discount_percent, checked_at, lowest_price, all_time_low, all_time_high,
+     average_price, last_discount_at, stored_grade, forecast,
+     drop_probability, trend_pct_per_week, sale_interval_days,
+     expected_sale_in_days, outlook_computed_at) = row
     
     # Parse JSON fields
     genres_list = parse_json_field(genres)
@@ -82,10 +163,14 @@ def transform_game_data_from_row(row):
     current_price = (final_price / 100.0) if final_price else 0
     original_price = (initial_price / 100.0) if initial_price else 0
     discount_percent_val = discount_percent or 0
-    historical_low = (lowest_price / 100.0) if lowest_price else current_price
+    all_time_low_val = format_cents(all_time_low)
+    historical_low = (lowest_price / 100.0) if lowest_price else (all_time_low_val or current_price)
     
-    # Calculate price grade (forecast removed from list view for performance)
-    price_grade = calculate_price_grade(current_price, historical_low, discount_percent_val)
+    # Grade and forecast are stored by the collector; only prices it has not
+    # assessed yet are graded here
+    price_grade = stored_grade or calculate_price_grade(
+        current_price, historical_low, discount_percent_val, all_time_low_val
+    )
     
     return {
         'id': str(app_id),
@@ -104,147 +189,509 @@ def transform_game_data_from_row(row):
         'original_price': original_price,
         'discount_percent': discount_percent_val,
         'historical_low': historical_low,
+        'all_time_low': all_time_low_val,
+        'all_time_high': format_cents(all_time_high),
+        'average_price': round(float(average_price) / 100.0, 2) if average_price is not None else None,
+        'last_discount_at': last_discount_at.isoformat() if last_discount_at else None,
         'price_grade': price_grade,
-        'forecast': 'stable',  # Default for list view, calculate on detail page
+        'forecast': forecast or 'stable',
+        # Batch outlook from forecast_job.py; None until it has run for this price
+        'outlook': {
+            'drop_probability': drop_probability,
+            'trend_pct_per_week': trend_pct_per_week,
+            'sale_interval_days': sale_interval_days,
+            'expected_sale_in_days': expected_sale_in_days,
+            'computed_at': outlook_computed_at.isoformat() if outlook_computed_at else None
+        } if outlook_computed_at else None,
         'short_description': short_description or '',
         'metacritic_score': metacritic_score,
         'recommendation_count': recommendation_count or 0
     }
 
+# Serialized /api/games and /api/deals responses, dropped whenever the
+# collectors bump the 'prices' row in data_versions
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    version_check_interval=float(os.getenv("RESPONSE_CACHE_VERSION_CHECK", "5"))
+)
+
+def fetch_data_version(conn):
+    """
+    Read the version the collectors bump after each run.
+    
+    Returns:
+        tuple: (version, updated_at), or None if the table is unavailable.
+    """
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT version, updated_at::timestamptz FROM data_versions WHERE name = 'prices'")
+        row = cur.fetchone()
+        cur.close()
+        return (row[0], row[1]) if row else (0, None)
+    except psycopg2.Error as e:
+        print(f"Could not read data version: {e}")
+        conn.rollback()
+        return None
+
+def sync_data_version(conn):
+    """Invalidate in-process caches if a collection run finished since the last check"""
+    if response_cache.sync_version(lambda: fetch_data_version(conn)):
+        count_cache.clear()
+    return response_cache.version
+
+def json_body_response(body, status=200):
+    """Wrap an already serialized JSON body in a response"""
+    return app.response_class(body, status=status, mimetype='application/json')
+
+def list_validators(cache_key, data_version):
+    """ETag and Last-Modified for list endpoints, derived from the data version"""
+    if data_version is None:
+        return None, None
+    version, updated_at = data_version
+    return make_etag(cache_key, version), updated_at
+
+def game_validators(cur, app_id, include_metadata=True):
+    """
+    ETag and Last-Modified for a single game's resources.
+    
+    Uses the newest price observation and, for the detail view, the
+    metadata update and outlook times; all come from indexed lookups.
+    """
+    if include_metadata:
+        cur.execute("""
+            SELECT GREATEST(
+                g.last_updated,
+                (SELECT MAX(checked_at) FROM current_prices WHERE app_id = g.app_id),
+                (SELECT MAX(computed_at) FROM price_forecasts WHERE app_id = g.app_id)
+            )::timestamptz
+            FROM games g
+            WHERE g.app_id = %s
+        """, (app_id,))
+    else:
+        cur.execute("SELECT MAX(checked_at)::timestamptz FROM current_prices WHERE app_id = %s", (app_id,))
+    row = cur.fetchone()
+    last_modified = row[0] if row else None
+    if last_modified is None:
+        return None, None
+    return make_etag(request.path, sorted(request.args.items(multi=True)), last_modified.isoformat()), last_modified
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'ok'})
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Connection pool and response cache counters for monitoring"""
+    return jsonify({
+        'db_pool': db_pool.stats(),
+        'response_cache': response_cache.stats()
+    })
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+# Largest perPage /api/games serves; /api/deals is capped by DEALS_MAX_ITEMS
+GAMES_MAX_PER_PAGE = int(os.getenv("GAMES_MAX_PER_PAGE", "100"))
+
+def parse_page_args(args, max_per_page):
+    """page (>= 1) and perPage (1..max_per_page) from the query parameters"""
+    page = max(args.get('page', 1, type=int), 1)
+    per_page = min(max(args.get('perPage', 24, type=int), 1), max_per_page)
+    return page, per_page
+
+def parse_bool_arg(name, default=False):
+    """Read a true/false style query parameter"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+HISTORY_DEFAULT_DAYS = 90
+HISTORY_DEFAULT_POINTS = 200
+HISTORY_MAX_POINTS = 1000
+
+def parse_history_time(value, end_of_day=False):
+    """
+    Parse an ISO date or datetime into naive UTC, as stored in price_history.
+    
+    Collector and API sessions both run with TimeZone=UTC, so LOCALTIMESTAMP
+    stamps and the partition bounds derived from them are UTC too.
+    """
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value.strip()) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+def parse_history_range(args):
+    """
+    Read the from/to/points parameters of the price-history endpoint.
+    
+    Returns:
+        tuple: (start, end, points). Defaults to the last 90 days and 200 points.
+        
+    Raises:
+        ValueError: On unparseable dates, an empty range or a bad point count.
+    """
+    end = parse_history_time(args['to'], end_of_day=True) if args.get('to') else datetime.utcnow()
+    start = parse_history_time(args['from']) if args.get('from') else end - timedelta(days=HISTORY_DEFAULT_DAYS)
+    if start > end:
+        raise ValueError("'from' must not be after 'to'")
+    try:
+        points = int(args.get('points', HISTORY_DEFAULT_POINTS))
+    except ValueError:
+        raise ValueError("'points' must be an integer")
+    return start, end, max(3, min(points, HISTORY_MAX_POINTS))
+
+def build_game_filters(args):
+    """
+    Build the WHERE clause shared by the game list queries.
+    
+    Args:
+        args: Request query parameters.
+        
+    Returns:
+        tuple: (SQL fragment starting with " AND", list of parameters)
+    """
+    search = args.get('search', '').lower()
+    discount_min = args.get('discountMin', 0, type=int)
+    price_min = args.get('priceMin', 0, type=float)
+    price_max = args.get('priceMax', 1000, type=float)
+    
+    # Convert prices to cents for database comparison
+    price_min_cents = int(price_min * 100)
+    price_max_cents = int(price_max * 100)
+    
+    clauses = ""
+    params = []
+    
+    if discount_min > 0:
+        clauses += " AND COALESCE(lp.discount_percent, 0) >= %s"
+        params.append(discount_min)
+    
+    if price_min > 0:
+        clauses += " AND COALESCE(lp.final_price, 0) >= %s"
+        params.append(price_min_cents)
+    
+    if price_max < 1000:
+        clauses += " AND (lp.final_price <= %s OR lp.final_price IS NULL)"
+        params.append(price_max_cents)
+    
+    # Stored by the collector, so filtering costs no per-row Python work
+    grades = [grade.strip().upper() for grade in args.get('grade', '').split(',') if grade.strip()]
+    if grades:
+        clauses += " AND lp.price_grade = ANY(%s)"
+        params.append(grades)
+    
+    forecast = args.get('forecast', '').strip().lower()
+    if forecast:
+        clauses += f" AND {FORECAST_EXPR} = %s"
+        params.append(forecast)
+    
+    drop_min = args.get('dropProbabilityMin', 0, type=float)
+    if drop_min > 0:
+        clauses += " AND pf.drop_probability >= %s"
+        params.append(drop_min)
+    
+    if search:
+        # Each branch is backed by an index: search_vector (GIN) for words and
+        # prefixes across name/genres/companies, the trigram index on
+        # LOWER(name) for substrings and typos.
+        tsquery = build_prefix_tsquery(search)
+        clauses += """ AND (
+            (%s <> '' AND g.search_vector @@ to_tsquery('simple', %s))
+            OR LOWER(g.name) LIKE %s
+            OR %s <%% LOWER(g.name)
+        )"""
+        params.extend([tsquery, tsquery, f"%{search}%", search])
+    
+    return clauses, params
+
+def build_prefix_tsquery(search):
+    """Turn free text into a tsquery where every word may be a prefix"""
+    words = re.findall(r'\w+', search.lower())
+    return ' & '.join(f"{word}:*" for word in words)
+
+def build_search_rank(args):
+    """
+    Relevance expression for the search filter.
+    
+    Returns:
+        tuple: (SQL expression or None when not searching, list of parameters)
+    """
+    search = args.get('search', '').lower()
+    if not search:
+        return None, []
+    
+    tsquery = build_prefix_tsquery(search)
+    rank = """(
+        CASE WHEN %s <> '' THEN ts_rank(g.search_vector, to_tsquery('simple', %s)) ELSE 0 END
+        + word_similarity(%s, LOWER(g.name))
+    )::float8"""
+    return rank, [tsquery, tsquery, search]
+
+# Filtered totals are expensive and change only when the collector runs
+count_cache = TTLCache(ttl=float(os.getenv("COUNT_CACHE_TTL", "60")), max_entries=512)
+
+# Region (country code) -> currency, learned by the collector
+region_cache = TTLCache(ttl=300.0, max_entries=256)
+
+# Currency used when a request names none. Unset, it is the currency of the
+# collector's primary region (the first of STEAM_REGIONS, else CURRENCY), so
+# a list never mixes prices in different currencies.
+DEFAULT_CURRENCY = os.getenv("API_DEFAULT_CURRENCY", "").upper() or None
+# Parsed like the collector's get_regions(): empty entries are skipped
+PRIMARY_REGION = next(
+    (cc.strip().lower() for cc in (os.getenv("STEAM_REGIONS") or os.getenv("CURRENCY", "us")).split(',')
+     if cc.strip()),
+    'us'
+)
+
+def default_currency(cur):
+    """
+    Currency shown when a request names none: API_DEFAULT_CURRENCY, else the
+    primary region's, else that of any collected region.
+    
+    Returns:
+        str: Currency code, or None before any region has been collected.
+    """
+    if DEFAULT_CURRENCY:
+        return DEFAULT_CURRENCY
+    currency = region_cache.get(PRIMARY_REGION)
+    if currency is None:
+        cur.execute("""
+            SELECT cc, currency FROM store_regions
+            ORDER BY cc = %s DESC, cc
+            LIMIT 1
+        """, (PRIMARY_REGION,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        cc, currency = row
+        # A fallback region's currency must not answer ?region=<primary>
+        if cc == PRIMARY_REGION:
+            region_cache.set(PRIMARY_REGION, currency)
+    return currency
+
+def resolve_currency(cur, args):
+    """
+    Currency a request asks for through ``currency`` (USD) or ``region`` (us).
+    
+    Returns:
+        str: Currency code, or default_currency() when neither is given.
+        
+    Raises:
+        ValueError: On a malformed currency or a region never collected.
+    """
+    currency = args.get('currency', '').strip().upper()
+    if currency:
+        if not re.fullmatch(r'[A-Z]{3}', currency):
+            raise ValueError(f"Invalid currency: {currency}")
+        return currency
+    
+    region = args.get('region', '').strip().lower()
+    if not region:
+        return default_currency(cur)
+    currency = region_cache.get(region)
+    if currency is None:
+        cur.execute("SELECT currency FROM store_regions WHERE cc = %s", (region,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError(f"Unknown region: {region}")
+        currency = row[0]
+        region_cache.set(region, currency)
+    return currency
+
+def count_rows(cur, query, params):
+    """Count the rows of a query, served from count_cache when possible"""
+    key = (query, tuple(params))
+    total = count_cache.get(key)
+    if total is None:
+        cur.execute(f"SELECT COUNT(*) FROM ({query}) AS counted", params)
+        total = cur.fetchone()[0]
+        count_cache.set(key, total)
+    return total
+
+def count_games(cur, joins, filters, params):
+    """Count games matching the filters; ``params`` covers the joins, then the filters"""
+    return count_rows(cur, f"""
+        SELECT 1
+        FROM games g
+        {joins}
+        WHERE 1=1 {filters}
+    """, params)
+
 @app.route('/api/games', methods=['GET'])
 def get_games():
-    """Get all games with current prices and pagination - OPTIMIZED VERSION"""
+    """
+    Get all games with current prices and pagination.
+    
+    Two pagination modes share the same response shape:
+    - page/perPage: classic page numbers with an exact (cached) total.
+    - after=<cursor>: keyset pagination on app_id (or on relevance then
+      app_id when searching); pass includeTotal=true to also get the total.
+    Both return pagination.nextCursor for fetching the following page.
+    
+    currency=EUR or region=de selects which collected prices are shown;
+    grade=A+,A and forecast=falling filter on the stored assessment,
+    dropProbabilityMin=0.6 on the batch outlook, and sort=grade lists the
+    best graded prices first.
+    """
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
+        data_version = sync_data_version(conn)
+        cache_key = ResponseCache.make_key('games', request.args)
+        etag, last_modified = list_validators(cache_key, data_version)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(app.response_class, etag, last_modified)
+        
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return apply_cache_headers(json_body_response(cached), etag, last_modified)
+        
         cur = conn.cursor()
         
+        try:
+            currency = resolve_currency(cur, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Get query parameters
-        search = request.args.get('search', '').lower()
-        discount_min = request.args.get('discountMin', 0, type=int)
-        price_min = request.args.get('priceMin', 0, type=float)
-        price_max = request.args.get('priceMax', 1000, type=float)
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('perPage', 24, type=int)
-        
-        # Calculate offset
-        offset = (page - 1) * per_page
-        
-        # Convert prices to cents for database comparison
-        price_min_cents = int(price_min * 100)
-        price_max_cents = int(price_max * 100)
-        
-        # Build the optimized query with CTEs
-        query = """
-            WITH latest_prices AS (
-                SELECT DISTINCT ON (app_id)
-                    app_id,
-                    currency,
-                    initial_price,
-                    final_price,
-                    discount_percent,
-                    checked_at
-                FROM price_history
-                ORDER BY app_id, checked_at DESC
-            ),
-            historical_lows AS (
-                SELECT 
-                    app_id,
-                    MIN(final_price) as lowest_price
-                FROM price_history
-                WHERE checked_at >= NOW() - INTERVAL '90 days'
-                GROUP BY app_id
-            )
-            SELECT 
-                g.app_id, g.name, g.short_description, g.header_image_url, g.release_date,
-                g.metacritic_score, g.recommendation_count,
-                g.platform_windows, g.platform_mac, g.platform_linux,
-                g.genres, g.publishers, g.developers,
-                lp.currency, lp.initial_price, lp.final_price, lp.discount_percent, lp.checked_at,
-                hl.lowest_price
-            FROM games g
-            LEFT JOIN latest_prices lp ON g.app_id = lp.app_id
-            LEFT JOIN historical_lows hl ON g.app_id = hl.app_id
-            WHERE 1=1
+        page, per_page = parse_page_args(request.args, GAMES_MAX_PER_PAGE)
+        after = request.args.get('after')
+        
+        joins, join_params = price_joins(currency)
+        filters, filter_params = build_game_filters(request.args)
+        filter_params = join_params + filter_params
+        search_rank, rank_params = build_search_rank(request.args)
+        sort_by_grade = request.args.get('sort') == 'grade'
+        
+        # Build the list query on the precomputed price tables. sort=grade
+        # orders by stored grade, searches by relevance, everything else by
+        # app_id.
+        query = f"""
+            SELECT * FROM (
+                SELECT {GAME_COLUMNS}, {search_rank or '0::float8'} AS search_rank,
+                    COALESCE(price_grade_rank(lp.price_grade), 9) AS grade_rank
+                FROM games g
+                {joins}
+                WHERE 1=1 {filters}
+            ) AS results
         """
-        
-        params = []
-        
-        # Apply filters
-        if discount_min > 0:
-            query += " AND COALESCE(lp.discount_percent, 0) >= %s"
-            params.append(discount_min)
-        
-        if price_min > 0:
-            query += " AND COALESCE(lp.final_price, 0) >= %s"
-            params.append(price_min_cents)
-        
-        if price_max < 1000:
-            query += " AND (lp.final_price <= %s OR lp.final_price IS NULL)"
-            params.append(price_max_cents)
-        
-        if search:
-            query += """ AND (
-                LOWER(g.name) LIKE %s 
-                OR EXISTS (
-                    SELECT 1 
-                    FROM jsonb_array_elements(g.genres) AS genre 
-                    WHERE LOWER(genre->>'description') LIKE %s
-                )
-            )"""
-            search_pattern = f"%{search}%"
-            params.extend([search_pattern, search_pattern])
-        
-        # Get total count with same filters
-        count_query = f"SELECT COUNT(*) FROM ({query}) as filtered_games"
-        cur.execute(count_query, params)
-        total_items = cur.fetchone()[0]
-        
-        # Add ordering and pagination
-        query += " ORDER BY g.app_id LIMIT %s OFFSET %s"
-        params.extend([per_page, offset])
-        
-        # Execute main query
+        params = rank_params + filter_params
+        if sort_by_grade:
+            order_by = " ORDER BY grade_rank, app_id"
+        elif search_rank:
+            order_by = " ORDER BY search_rank DESC, app_id"
+        else:
+            order_by = " ORDER BY app_id"
+        
+        if after:
+            cursor_values = decode_cursor(after)
+            expected_length = 2 if search_rank or sort_by_grade else 1
+            if (not cursor_values or len(cursor_values) != expected_length
+                    or not all(isinstance(v, (int, float)) for v in cursor_values)):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            
+            # Seek past the last row instead of counting through OFFSET rows
+            if sort_by_grade:
+                query += " WHERE (grade_rank > %s OR (grade_rank = %s AND app_id > %s))"
+                params.extend([cursor_values[1], cursor_values[1], cursor_values[0]])
+            elif search_rank:
+                query += " WHERE (search_rank < %s::float8 OR (search_rank = %s::float8 AND app_id > %s))"
+                params.extend([cursor_values[1], cursor_values[1], cursor_values[0]])
+            else:
+                query += " WHERE app_id > %s"
+                params.append(cursor_values[0])
+            query += order_by + " LIMIT %s"
+            params.append(per_page + 1)
+        else:
+            offset = (page - 1) * per_page
+            query += order_by + " LIMIT %s OFFSET %s"
+            params.extend([per_page + 1, offset])
+        
+        # Execute main query, fetching one extra row to detect a next page
         cur.execute(query, params)
         games = cur.fetchall()
+        has_next = len(games) > per_page
+        games = games[:per_page]
         
         # Transform results
-        result = [transform_game_data_from_row(game) for game in games]
-        
-        # Calculate pagination metadata
-        total_pages = (total_items + per_page - 1) // per_page if total_items > 0 else 1
-        
-        cur.close()
-        conn.close()
-        
-        return jsonify({
-            'games': result,
-            'pagination': {
+        result = [transform_game_data_from_row(game[:GAME_COLUMN_COUNT]) for game in games]
+        next_cursor = None
+        if has_next:
+            last = games[-1]
+            if sort_by_grade:
+                next_cursor = encode_cursor([last[0], last[GAME_COLUMN_COUNT + 1]])
+            elif search_rank:
+                next_cursor = encode_cursor([last[0], last[GAME_COLUMN_COUNT]])
+            else:
+                next_cursor = encode_cursor([last[0]])
+        
+        if after:
+            total_items = None
+            total_pages = None
+            if parse_bool_arg('includeTotal'):
+                total_items = count_games(cur, joins, filters, filter_params)
+                total_pages = (total_items + per_page - 1) // per_page if total_items > 0 else 1
+            pagination = {
+                'page': None,
+                'perPage': per_page,
+                'totalItems': total_items,
+                'totalPages': total_pages,
+                'hasNext': has_next,
+                'hasPrev': True,
+                'nextCursor': next_cursor
+            }
+        else:
+            total_items = count_games(cur, joins, filters, filter_params)
+            total_pages = (total_items + per_page - 1) // per_page if total_items > 0 else 1
+            pagination = {
                 'page': page,
                 'perPage': per_page,
                 'totalItems': total_items,
                 'totalPages': total_pages,
-                'hasNext': page < total_pages,
-                'hasPrev': page > 1
+                'hasNext': has_next,
+                'hasPrev': page > 1,
+                'nextCursor': next_cursor
             }
+        
+        cur.close()
+        
+        body = json.dumps({
+            'games': result,
+            'pagination': pagination
         })
+        response_cache.set(cache_key, body.encode(), data_version)
+        return apply_cache_headers(json_body_response(body), etag, last_modified)
     
     except Exception as e:
-        if conn:
-            conn.close()
         print(f"Error in get_games: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/games/<int:app_id>', methods=['GET'])
 def get_game_details(app_id):
-    """Get detailed information about a specific game with forecast calculation"""
+    """Get detailed information about a specific game"""
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -252,204 +699,281 @@ def get_game_details(app_id):
     try:
         cur = conn.cursor()
         
-        # Use optimized query for single game
-        query = """
-            WITH latest_price AS (
-                SELECT DISTINCT ON (app_id)
-                    app_id,
-                    currency,
-                    initial_price,
-                    final_price,
-                    discount_percent,
-                    checked_at
-                FROM price_history
-                WHERE app_id = %s
-                ORDER BY app_id, checked_at DESC
-                LIMIT 1
-            ),
-            historical_low AS (
-                SELECT 
-                    app_id,
-                    MIN(final_price) as lowest_price
-                FROM price_history
-                WHERE app_id = %s
-                    AND checked_at >= NOW() - INTERVAL '90 days'
-                GROUP BY app_id
-            ),
-            price_history_30d AS (
-                SELECT 
-                    checked_at,
-                    final_price
-                FROM price_history
-                WHERE app_id = %s
-                ORDER BY checked_at DESC
-                LIMIT 30
-            )
-            SELECT 
-                g.app_id, g.name, g.short_description, g.header_image_url, g.release_date,
-                g.metacritic_score, g.recommendation_count,
-                g.platform_windows, g.platform_mac, g.platform_linux,
-                g.genres, g.publishers, g.developers,
-                lp.currency, lp.initial_price, lp.final_price, lp.discount_percent, lp.checked_at,
-                hl.lowest_price,
-                COALESCE(
-                    json_agg(
-                        json_build_object('date', ph.checked_at, 'price', ph.final_price)
-                        ORDER BY ph.checked_at DESC
-                    ) FILTER (WHERE ph.checked_at IS NOT NULL),
-                    '[]'::json
-                ) as price_history
+        try:
+            currency = resolve_currency(cur, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag, last_modified = game_validators(cur, app_id)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(app.response_class, etag, last_modified)
+        
+        joins, join_params = price_joins(currency)
+        
+        # Grade and forecast come precomputed with the current price
+        query = f"""
+            SELECT {GAME_COLUMNS}
             FROM games g
-            LEFT JOIN latest_price lp ON g.app_id = lp.app_id
-            LEFT JOIN historical_low hl ON g.app_id = hl.app_id
-            LEFT JOIN price_history_30d ph ON g.app_id = %s
+            {joins}
             WHERE g.app_id = %s
-            GROUP BY g.app_id, g.name, g.short_description, g.header_image_url, g.release_date,
-                     g.metacritic_score, g.recommendation_count, g.platform_windows, g.platform_mac, 
-                     g.platform_linux, g.genres, g.publishers, g.developers,
-                     lp.currency, lp.initial_price, lp.final_price, lp.discount_percent, 
-                     lp.checked_at, hl.lowest_price
         """
         
-        cur.execute(query, (app_id, app_id, app_id, app_id, app_id))
+        cur.execute(query, join_params + [app_id])
         game = cur.fetchone()
         
         if not game:
             return jsonify({'error': 'Game not found'}), 404
         
-        # Extract price history from the row
-        price_history_json = game[19] if len(game) > 19 else []
-        
-        # Transform main game data
-        game_data = transform_game_data_from_row(game[:19])
-        
-        # Calculate forecast from price history
-        if price_history_json and len(price_history_json) >= 2:
-            # Sort by date and get last 7 days
-            recent_prices = sorted(price_history_json[-7:], key=lambda x: x['date'])
-            
-            if len(recent_prices) >= 2:
-                first_price = recent_prices[0]['price'] / 100.0
-                last_price = recent_prices[-1]['price'] / 100.0
-                
-                if first_price > 0:
-                    change_percent = ((last_price - first_price) / first_price) * 100
-                    
-                    if change_percent < -5:
-                        game_data['forecast'] = "falling"
-                    elif change_percent > 5:
-                        game_data['forecast'] = "rising"
-                    else:
-                        game_data['forecast'] = "stable"
+        game_data = transform_game_data_from_row(game)
         
         cur.close()
-        conn.close()
         
-        return jsonify(game_data)
+        return apply_cache_headers(jsonify(game_data), etag, last_modified)
     
     except Exception as e:
-        if conn:
-            conn.close()
         print(f"Error in get_game_details: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/games/<int:app_id>/price-history', methods=['GET'])
 def get_price_history(app_id):
-    """Get price history for a specific game"""
+    """Get price history for a specific game, downsampled with LTTB to at most ``points`` points"""
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
+    try:
+        start, end, max_points = parse_history_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         cur = conn.cursor()
         
-        # Get price history (last 90 days)
-        cur.execute("""
-            SELECT checked_at, final_price
-            FROM price_history
-            WHERE app_id = %s
-            ORDER BY checked_at ASC
-        """, (app_id,))
-        
-        history = cur.fetchall()
+        try:
+            currency = resolve_currency(cur, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag, last_modified = game_validators(cur, app_id, include_metadata=False)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(app.response_class, etag, last_modified)
+        
+        if currency is None:
+            # One series per chart: default to the game's latest currency
+            cur.execute("""
+                SELECT currency FROM current_prices
+                WHERE app_id = %s
+                ORDER BY checked_at DESC
+                LIMIT 1
+            """, (app_id,))
+            row = cur.fetchone()
+            currency = row[0] if row else None
+        
+        # Raw intervals in range (the checked_at bound prunes partitions),
+        # plus daily rollups for months that have been downsampled
+        cur.execute(f"""
+            SELECT p.observed_at, h.final_price
+            FROM price_history h
+            {HISTORY_POINTS}
+            WHERE h.app_id = %(app_id)s
+                AND h.currency = %(currency)s
+                AND h.last_seen_at >= %(start)s
+                AND h.checked_at <= %(end)s
+                AND h.checked_at >= date_trunc('month', %(start)s::timestamp)
+                AND h.final_price IS NOT NULL
+                AND p.observed_at BETWEEN %(start)s AND %(end)s
+            UNION ALL
+            SELECT d.day::timestamp, d.close_price
+            FROM price_history_daily d
+            WHERE d.app_id = %(app_id)s
+                AND d.currency = %(currency)s
+                AND d.day BETWEEN %(start)s::date AND %(end)s::date
+                AND d.close_price IS NOT NULL
+            ORDER BY 1
+        """, {'app_id': app_id, 'currency': currency, 'start': start, 'end': end})
+        
+        history = [(row[0].timestamp(), row[1], row[0]) for row in cur.fetchall()]
+        history = lttb(history, max_points)
         
         result = [
             {
-                'date': row[0].isoformat() if row[0] else datetime.now().isoformat(),
-                'price': row[1] / 100.0 if row[1] else 0
+                'date': observed_at.isoformat(),
+                'price': price / 100.0
             }
-            for row in history
+            for _, price, observed_at in history
         ]
         
         cur.close()
-        conn.close()
         
-        return jsonify(result)
+        return apply_cache_headers(jsonify(result), etag, last_modified)
     
     except Exception as e:
-        if conn:
-            conn.close()
         return jsonify({'error': str(e)}), 500
 
+# Discounted games with the same filters as /api/games. The latest
+# discounted snapshot per game comes from the partial indexes on
+# current_prices (per currency when one is requested).
+DEALS_QUERY = f"""
+    WITH latest_prices AS (
+        SELECT DISTINCT ON (app_id)
+            app_id, currency, initial_price, final_price, discount_percent, checked_at,
+            price_grade, forecast
+        FROM current_prices
+        WHERE discount_percent > 0 {{currency_filter}}
+        ORDER BY app_id, checked_at DESC
+    )
+    SELECT * FROM (
+        SELECT {GAME_COLUMNS}, lp.discount_percent AS sort_discount,
+            COALESCE(price_grade_rank(lp.price_grade), 9) AS grade_rank
+        FROM games g
+        INNER JOIN latest_prices lp ON g.app_id = lp.app_id
+        LEFT JOIN price_stats ps ON ps.app_id = g.app_id AND ps.currency = lp.currency
+        LEFT JOIN price_forecasts pf ON pf.app_id = g.app_id AND pf.currency = lp.currency
+        WHERE 1=1 {{filters}}
+    ) AS results
+"""
+DEALS_ORDER_BY = " ORDER BY sort_discount DESC, app_id"
+DEALS_GRADE_ORDER_BY = " ORDER BY grade_rank, sort_discount DESC, app_id"
+
+# Upper bound for the legacy unpaginated response and for perPage
+DEALS_MAX_ITEMS = int(os.getenv("DEALS_MAX_ITEMS", "500"))
+# Rows fetched per round trip by streaming server-side cursors
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", "500"))
+
+def stream_deals(conn, query, params):
+    """Yield deals as NDJSON lines from a server-side cursor"""
+    cur = conn.cursor(name='deals_stream')
+    cur.itersize = STREAM_FETCH_SIZE
+    try:
+        cur.execute(query, params)
+        for row in cur:
+            yield json.dumps(transform_game_data_from_row(row[:GAME_COLUMN_COUNT])) + '\n'
+    except Exception as e:
+        # Headers are already sent; all we can do is stop the stream
+        print(f"Error streaming deals: {e}")
+    finally:
+        cur.close()
+
 @app.route('/api/deals', methods=['GET'])
 def get_deals():
-    """Get games with deals (discounts) - OPTIMIZED VERSION"""
+    """
+    Get discounted games, biggest discount first (best grade first with
+    sort=grade).
+    
+    Accepts the /api/games filters, including currency/region and
+    grade/forecast. Three response modes:
+    - no pagination parameters: a plain array of up to DEALS_MAX_ITEMS deals.
+    - page/perPage or after=<cursor>: {deals, pagination}, as /api/games.
+    - stream=true: every matching deal as NDJSON, read through a server-side
+      cursor so memory use stays flat however many deals there are.
+    """
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cur = conn.cursor()
-        
-        # Optimized query for deals
-        query = """
-            WITH latest_prices AS (
-                SELECT DISTINCT ON (app_id)
-                    app_id,
-                    currency,
-                    initial_price,
-                    final_price,
-                    discount_percent,
-                    checked_at
-                FROM price_history
-                WHERE discount_percent > 0
-                ORDER BY app_id, checked_at DESC
-            ),
-            historical_lows AS (
-                SELECT 
-                    app_id,
-                    MIN(final_price) as lowest_price
-                FROM price_history
-                WHERE checked_at >= NOW() - INTERVAL '90 days'
-                GROUP BY app_id
+        try:
+            with conn.cursor() as cur:
+                currency = resolve_currency(cur, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        filters, filter_params = build_game_filters(request.args)
+        query = DEALS_QUERY.format(
+            filters=filters,
+            currency_filter="AND currency = %s" if currency else ""
+        )
+        params = ([currency] if currency else []) + list(filter_params)
+        sort_by_grade = request.args.get('sort') == 'grade'
+        order_by = DEALS_GRADE_ORDER_BY if sort_by_grade else DEALS_ORDER_BY
+        
+        if parse_bool_arg('stream'):
+            return app.response_class(
+                stream_with_context(stream_deals(conn, query + order_by, params)),
+                mimetype='application/x-ndjson'
             )
-            SELECT 
-                g.app_id, g.name, g.short_description, g.header_image_url, g.release_date,
-                g.metacritic_score, g.recommendation_count,
-                g.platform_windows, g.platform_mac, g.platform_linux,
-                g.genres, g.publishers, g.developers,
-                lp.currency, lp.initial_price, lp.final_price, lp.discount_percent, lp.checked_at,
-                hl.lowest_price
-            FROM games g
-            INNER JOIN latest_prices lp ON g.app_id = lp.app_id
-            LEFT JOIN historical_lows hl ON g.app_id = hl.app_id
-            ORDER BY lp.discount_percent DESC
-        """
         
-        cur.execute(query)
-        games = cur.fetchall()
+        data_version = sync_data_version(conn)
+        cache_key = ResponseCache.make_key('deals', request.args)
+        etag, last_modified = list_validators(cache_key, data_version)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(app.response_class, etag, last_modified)
         
-        # Transform results
-        result = [transform_game_data_from_row(game) for game in games]
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return apply_cache_headers(json_body_response(cached), etag, last_modified)
+        
+        cur = conn.cursor()
+        after = request.args.get('after')
+        paginated = after or 'page' in request.args or 'perPage' in request.args
+        
+        if not paginated:
+            cur.execute(query + order_by + " LIMIT %s", params + [DEALS_MAX_ITEMS])
+            body = json.dumps([transform_game_data_from_row(row[:GAME_COLUMN_COUNT]) for row in cur.fetchall()])
+            cur.close()
+            response_cache.set(cache_key, body.encode(), data_version)
+            return apply_cache_headers(json_body_response(body), etag, last_modified)
+        
+        page, per_page = parse_page_args(request.args, DEALS_MAX_ITEMS)
+        page_query = query
+        page_params = list(params)
+        
+        if after:
+            cursor_values = decode_cursor(after)
+            if (not cursor_values or len(cursor_values) != (3 if sort_by_grade else 2)
+                    or not all(isinstance(v, int) for v in cursor_values)):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            discount, last_app_id = cursor_values[-2:]
+            seek = "(sort_discount < %s OR (sort_discount = %s AND app_id > %s))"
+            seek_params = [discount, discount, last_app_id]
+            if sort_by_grade:
+                grade_rank = cursor_values[0]
+                seek = f"(grade_rank > %s OR (grade_rank = %s AND {seek}))"
+                seek_params = [grade_rank, grade_rank] + seek_params
+            page_query += f" WHERE {seek}"
+            page_params.extend(seek_params)
+            page_query += order_by + " LIMIT %s"
+            page_params.append(per_page + 1)
+        else:
+            page_query += order_by + " LIMIT %s OFFSET %s"
+            page_params.extend([per_page + 1, (page - 1) * per_page])
+        
+        cur.execute(page_query, page_params)
+        rows = cur.fetchall()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        result = [transform_game_data_from_row(row[:GAME_COLUMN_COUNT]) for row in rows]
+        next_cursor = None
+        if has_next:
+            last = rows[-1]
+            sort_key = [last[GAME_COLUMN_COUNT], last[0]]
+            next_cursor = encode_cursor([last[GAME_COLUMN_COUNT + 1]] + sort_key if sort_by_grade else sort_key)
+        
+        total_items = None
+        total_pages = None
+        if not after or parse_bool_arg('includeTotal'):
+            total_items = count_rows(cur, query, params)
+            total_pages = (total_items + per_page - 1) // per_page if total_items > 0 else 1
         
         cur.close()
-        conn.close()
         
-        return jsonify(result)
+        body = json.dumps({
+            'deals': result,
+            'pagination': {
+                'page': None if after else page,
+                'perPage': per_page,
+                'totalItems': total_items,
+                'totalPages': total_pages,
+                'hasNext': has_next,
+                'hasPrev': True if after else page > 1,
+                'nextCursor': next_cursor
+            }
+        })
+        response_cache.set(cache_key, body.encode(), data_version)
+        return apply_cache_headers(json_body_response(body), etag, last_modified)
     
     except Exception as e:
-        if conn:
-            conn.close()
         print(f"Error in get_deals: {e}")
         return jsonify({'error': str(e)}), 500
 
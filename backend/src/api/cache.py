@@ -0,0 +1,178 @@
+"""
+In-process caches for the Flask API.
+
+Each worker process keeps its own copy; nothing here is shared across
+processes, so entries must be safe to serve slightly stale.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Args:
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Least recently used entries are dropped beyond this.
+    """
+
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses bounded by total size in bytes.
+
+    Entries expire after ``ttl`` seconds and are dropped wholesale whenever
+    the data version published by the collectors changes (see sync_version).
+
+    Args:
+        max_bytes (int): Upper bound on the summed size of cached bodies.
+        ttl (float): Seconds an entry stays valid even without a new version.
+        version_check_interval (float): Minimum seconds between version lookups.
+    """
+
+    def __init__(self, max_bytes, ttl=300.0, version_check_interval=5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._last_version_check = None
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0,
+                       'invalidations': 0, 'oversized': 0}
+
+    @staticmethod
+    def make_key(endpoint, args):
+        """Build a cache key that ignores parameter order and search casing"""
+        items = []
+        for name in sorted(args):
+            values = [value.strip() for value in args.getlist(name) if value.strip()]
+            if name == 'search':
+                values = [value.lower() for value in values]
+            if values:
+                items.append((name, tuple(values)))
+        return (endpoint, tuple(items))
+
+    def sync_version(self, fetch_version):
+        """
+        Clear the cache if the data version moved since the last check.
+
+        Args:
+            fetch_version (callable): Returns the current version, or None
+                if it cannot be determined.
+
+        Returns:
+            bool: True if the cache was invalidated.
+        """
+        now = time.monotonic()
+        if (self._last_version_check is not None
+                and now - self._last_version_check < self.version_check_interval):
+            return False
+        self._last_version_check = now
+
+        version = fetch_version()
+        if version is None or version == self._version:
+            return False
+
+        with self._lock:
+            self._version = version
+            self._entries.clear()
+            self._size = 0
+            self._stats['invalidations'] += 1
+        return True
+
+    @property
+    def version(self):
+        """Data version the cached entries were built from"""
+        return self._version
+
+    def get(self, key):
+        """Return the cached body, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return body
+
+    def set(self, key, body, version=None):
+        """
+        Store a serialized body, evicting least recently used entries to fit.
+
+        Pass the version observed before building the body; if the data moved
+        on while the response was being built, the body is not cached.
+        """
+        size = len(body)
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            if size > self.max_bytes:
+                self._stats['oversized'] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._size + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats['evictions'] += 1
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._size += size
+
+    def _drop(self, key):
+        _, body = self._entries.pop(key)
+        self._size -= len(body)
+
+    def stats(self):
+        """Snapshot of hit/miss/eviction counters for monitoring"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+            snapshot['bytes'] = self._size
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_ratio'] = snapshot['hits'] / lookups if lookups else 0.0
+        snapshot['max_bytes'] = self.max_bytes
+        snapshot['version'] = self._version
+        return snapshot
@@ -0,0 +1,205 @@
+"""
+PostgreSQL connection pooling for the Flask API.
+
+Connections are created lazily per process, so each gunicorn/uwsgi worker
+gets its own pool after fork instead of sharing sockets with the master.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool as pg_pool
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection frees up within the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe connection pool with bounded checkout wait and health checks.
+
+    Args:
+        minconn (int): Connections opened eagerly when the pool is created.
+        maxconn (int): Hard cap on open connections per process.
+        checkout_timeout (float): Seconds to wait for a free connection.
+        healthcheck_interval (float): Connections idle for longer than this
+            are pinged with ``SELECT 1`` before being handed out.
+        **dsn: Keyword arguments passed to ``psycopg2.connect``.
+    """
+
+    def __init__(self, minconn, maxconn, checkout_timeout=5.0,
+                 healthcheck_interval=30.0, **dsn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._dsn = dsn
+
+        self._pid = None
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._reset_stats()
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from the DB_* environment variables"""
+        return cls(
+            minconn=int(os.getenv("DB_POOL_MIN", "1")),
+            maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+            checkout_timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            healthcheck_interval=float(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", "30")),
+            host=os.getenv("DB_HOST", "localhost"),
+            database=os.getenv("DB_NAME", "steam_prices"),
+            user=os.getenv("DB_USER", "steam_user"),
+            password=os.getenv("DB_PASSWORD"),
+            port=os.getenv("DB_PORT", "5432"),
+            # Same session time zone as the collectors: stored timestamps
+            # are naive UTC
+            options='-c TimeZone=UTC'
+        )
+
+    def _reset_stats(self):
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+            'saturated_checkouts': 0,
+            'healthcheck_failures': 0,
+            'in_use': 0,
+            'peak_in_use': 0,
+        }
+
+    def _ensure_pool(self):
+        """Create the pool on first use, or recreate it after a fork"""
+        pid = os.getpid()
+        if self._pool is not None and self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pool is not None and self._pid == pid:
+                return
+            # After a fork the inherited sockets belong to the parent; drop
+            # them without closing so the parent's sessions stay intact.
+            self._pool = pg_pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self._dsn)
+            self._slots = threading.BoundedSemaphore(self.maxconn)
+            self._last_used = {}
+            self._pid = pid
+            self._reset_stats()
+
+    def _is_healthy(self, conn):
+        """Check that a connection is still usable before handing it out"""
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """
+        Check out a connection, waiting up to ``checkout_timeout`` seconds.
+
+        Raises:
+            PoolTimeoutError: If every connection stays in use for the whole wait.
+        """
+        self._ensure_pool()
+
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['saturated_checkouts'] += 1
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.checkout_timeout}s"
+                )
+        waited = time.monotonic() - started
+
+        try:
+            conn = self._pool.getconn()
+            while not self._is_healthy(conn):
+                with self._lock:
+                    self._stats['healthcheck_failures'] += 1
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            stats = self._stats
+            stats['checkouts'] += 1
+            if waited > 0.001:
+                stats['waits'] += 1
+            stats['wait_seconds_total'] += waited
+            stats['wait_seconds_max'] = max(stats['wait_seconds_max'], waited)
+            stats['in_use'] += 1
+            stats['peak_in_use'] = max(stats['peak_in_use'], stats['in_use'])
+
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection, rolling back anything left open by the caller"""
+        if self._pool is None or self._pid != os.getpid():
+            return
+
+        close = conn.closed != 0
+        if not close and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        if close:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+
+        self._pool.putconn(conn, close=close)
+        self._slots.release()
+        with self._lock:
+            self._stats['in_use'] -= 1
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always returns the connection to the pool"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        """Snapshot of pool usage counters for monitoring"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        checkouts = snapshot['checkouts']
+        snapshot['wait_seconds_avg'] = (snapshot['wait_seconds_total'] / checkouts) if checkouts else 0.0
+        snapshot['min_size'] = self.minconn
+        snapshot['max_size'] = self.maxconn
+        snapshot['utilization'] = snapshot['in_use'] / self.maxconn if self.maxconn else 0.0
+        snapshot['pid'] = os.getpid()
+        return snapshot
+
+    def closeall(self):
+        """Close every connection owned by this process"""
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.closeall()
+        self._pool = None
+        self._pid = None
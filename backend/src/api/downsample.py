@@ -0,0 +1,57 @@
+"""
+Downsampling of time series for chart responses.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) keeps the points that
+contribute most to the visual shape of a line, so a chart drawn from a few
+hundred points looks like one drawn from the full series.
+"""
+
+
+def lttb(points, threshold):
+    """
+    Reduce a series to at most ``threshold`` points with LTTB.
+
+    Args:
+        points (list): Tuples starting with numeric (x, y), sorted by x;
+            extra fields are carried through untouched.
+        threshold (int): Maximum number of points to return (at least 3).
+
+    Returns:
+        list: Selected points, always including the first and last.
+    """
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+    count = len(points)
+    if count <= threshold:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_points) / len(next_points)
+        avg_y = sum(p[1] for p in next_points) / len(next_points)
+
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        ax, ay = points[selected][0], points[selected][1]
+
+        best_area = -1.0
+        best_index = start
+        for index in range(start, end):
+            x, y = points[index][0], points[index][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best_index = index
+
+        sampled.append(points[best_index])
+        selected = best_index
+
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,61 @@
+"""
+Conditional GET helpers (ETag / Last-Modified / 304) for the Flask API.
+
+Routes compute a cheap validator (a timestamp or data version) before
+running their main query, answer 304 when the client already has that
+version, and attach the same validators to full responses.
+"""
+import hashlib
+import os
+from datetime import timezone
+
+from flask import request
+
+
+def make_etag(*parts):
+    """Build a strong ETag value from anything that identifies the representation"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return digest[:32]
+
+
+def _as_utc(value):
+    """Normalize a datetime to aware UTC with whole seconds, as HTTP dates carry"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_not_modified(etag, last_modified):
+    """
+    Check the request's conditional headers against the current validators.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    """
+    if etag is not None and request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    last_modified = _as_utc(last_modified)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= _as_utc(request.if_modified_since)
+
+    return False
+
+
+def apply_cache_headers(response, etag, last_modified, max_age=None):
+    """Attach validators and a shared-cache policy to a response"""
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.cache_control.public = True
+    if max_age is None:
+        max_age = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+    response.cache_control.max_age = max_age
+    return response
+
+
+def not_modified_response(response_class, etag, last_modified):
+    """Empty 304 carrying the same validators as the full response would"""
+    return apply_cache_headers(response_class(status=304), etag, last_modified)
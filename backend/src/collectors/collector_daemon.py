@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Long-running collector service.
+
+Runs price polling (poll_scheduler), metadata refresh, top-seller
+discovery and the batch price outlook (forecast_job) as scheduled jobs in
+one process, so they share one Steam client, one adaptive rate limiter and
+one database pool instead of competing as separate cron'd scripts. A
+PostgreSQL advisory lock keeps a second instance from polling at the same
+time, and a status file (plus an optional local HTTP endpoint) reports queue
+depth and the last run of every job.
+
+Usage:
+    python collector_daemon.py [--jobs prices,metadata,discovery,forecast]
+
+SIGTERM or Ctrl-C lets running jobs finish and exits; a second signal exits
+immediately (interrupted collection runs resume on the next start).
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+import psycopg2
+
+from db_pool import close_pool, connection_settings, get_db_connection, install_pool, pool_size
+from forecast_job import run_forecasts
+from game_list_manager import filter_and_add_games, get_games_due_for_metadata, scrape_top_games
+from poll_scheduler import run_cycle, schedule_settings
+from rate_limiter import get_shared_limiter
+from steam_client import get_shared_client
+from steam_price_collector import get_regions, refresh_game_metadata
+
+load_dotenv()
+
+# pg_try_advisory_lock key held for the daemon's lifetime ("dfcd")
+DAEMON_LOCK_KEY = 0x64666364
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    """
+    A task the daemon repeats on its own thread.
+
+    Args:
+        name (str): Name shown in the status report.
+        run (callable): Does one round of work. May return the seconds to
+            wait before the next round; otherwise ``interval`` is used.
+        interval (float): Default seconds between rounds.
+        connections (int): Pooled connections a round holds at once.
+    """
+
+    def __init__(self, name, run, interval, connections=1):
+        self.name = name
+        self.run = run
+        self.interval = interval
+        self.connections = connections
+        self.state = {
+            'running': False,
+            'runs': 0,
+            'failures': 0,
+            'last_started_at': None,
+            'last_finished_at': None,
+            'last_duration_seconds': None,
+            'last_error': None,
+            'next_run_at': None,
+        }
+
+
+class CollectorDaemon:
+    """
+    Supervises the collector jobs and reports their status.
+
+    Args:
+        jobs (list): Job instances to run.
+        status_file (str): JSON status written every ``status_interval`` seconds.
+        status_port (int): Serve the same JSON on 127.0.0.1 when set.
+        status_interval (float): Seconds between status refreshes.
+    """
+
+    def __init__(self, jobs, status_file, status_port=None, status_interval=30.0):
+        self.jobs = jobs
+        self.status_file = status_file
+        self.status_port = status_port
+        self.status_interval = status_interval
+        self.started_at = utc_now()
+        self.stopping = threading.Event()
+        self.limiter = get_shared_limiter()
+        self.client = get_shared_client()
+        self._lock_conn = None
+        self._queue = {}
+        self._signals = 0
+
+    def acquire_lock(self):
+        """Take the instance lock on a dedicated connection; False if another daemon holds it"""
+        self._lock_conn = psycopg2.connect(**connection_settings())
+        self._lock_conn.autocommit = True
+        with self._lock_conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (DAEMON_LOCK_KEY,))
+            return cur.fetchone()[0]
+
+    def lock_alive(self):
+        """The lock lives as long as its session; check the session is still up"""
+        try:
+            with self._lock_conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def handle_signal(self, signum, frame):
+        self._signals += 1
+        if self._signals > 1:
+            print("🛑 Second signal, exiting now")
+            os._exit(1)
+        print(f"🛑 Signal {signum} received, finishing running jobs (signal again to force)")
+        self.stopping.set()
+
+    def _job_loop(self, job):
+        while not self.stopping.is_set():
+            state = job.state
+            state['running'] = True
+            state['last_started_at'] = utc_now()
+            started = time.monotonic()
+            delay = None
+            try:
+                delay = job.run()
+                state['last_error'] = None
+            except (Exception, SystemExit) as e:
+                # Collector helpers sys.exit() on fatal errors; in the
+                # daemon that only fails this round
+                state['failures'] += 1
+                state['last_error'] = f"{type(e).__name__}: {e}"
+                print(f"❌ Job {job.name} failed: {state['last_error']}")
+            state['runs'] += 1
+            state['running'] = False
+            state['last_finished_at'] = utc_now()
+            state['last_duration_seconds'] = round(time.monotonic() - started, 1)
+
+            delay = job.interval if delay is None else delay
+            state['next_run_at'] = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+            self.stopping.wait(delay)
+
+    def refresh_queue_depth(self):
+        """Games due for a price poll and for metadata, for the status report"""
+        conn = cur = None
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            # Same due predicates as get_due_games / get_games_due_for_metadata
+            cur.execute("""
+                SELECT
+                    COUNT(*) FILTER (WHERE t.next_due_at IS NULL OR t.next_due_at <= LOCALTIMESTAMP),
+                    COUNT(*) FILTER (
+                        WHERE t.metadata_checked_at IS NULL
+                            OR GREATEST(t.metadata_checked_at, g.last_updated)
+                                < NOW() - make_interval(secs => %s)
+                    ),
+                    COUNT(*)
+                FROM games_to_track t
+                LEFT JOIN games g ON g.app_id = t.app_id
+                WHERE t.status = 'active' AND t.is_free_to_play = FALSE
+            """, (float(os.getenv("METADATA_MAX_AGE_DAYS", "7")) * 86400,))
+            prices_due, metadata_due, tracked = cur.fetchone()
+            self._queue = {'prices_due': prices_due, 'metadata_due': metadata_due,
+                           'tracked': tracked, 'measured_at': utc_now()}
+        except psycopg2.Error as e:
+            # Includes PoolError when no connection frees up in time
+            if conn is not None:
+                conn.rollback()
+            print(f"⚠️  Could not measure queue depth: {e}")
+        finally:
+            if cur is not None:
+                cur.close()
+            if conn is not None:
+                conn.close()
+
+    def status(self):
+        cache = self.client.cache
+        return {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'updated_at': utc_now(),
+            'stopping': self.stopping.is_set(),
+            'request_rate': round(self.limiter.rate, 3),
+            'queue': self._queue,
+            'jobs': {job.name: dict(job.state, interval_seconds=job.interval) for job in self.jobs},
+            'response_cache': {'hits': cache.hits, 'misses': cache.misses} if cache else None,
+        }
+
+    def write_status(self):
+        tmp_path = f"{self.status_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.status(), f, indent=2)
+            os.replace(tmp_path, self.status_file)
+        except OSError as e:
+            print(f"⚠️  Could not write daemon status: {e}")
+
+    def serve_status(self):
+        daemon = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps(daemon.status()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(('127.0.0.1', self.status_port), StatusHandler)
+        threading.Thread(target=server.serve_forever, name='status-http', daemon=True).start()
+        print(f"📡 Status on http://127.0.0.1:{self.status_port}/")
+        return server
+
+    def run(self):
+        # Every job may hold its connections at once, plus one for the
+        # status loop's queue-depth query
+        required = sum(job.connections for job in self.jobs) + 1
+        if pool_size() < required:
+            print(f"❌ COLLECTOR_DB_POOL_MAX={pool_size()} is too small for "
+                  f"{', '.join(job.name for job in self.jobs)} (need at least {required})")
+            return 2
+
+        if not self.acquire_lock():
+            print("⚠️  Another collector daemon holds the lock; exiting")
+            return 1
+
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        signal.signal(signal.SIGINT, self.handle_signal)
+        install_pool()
+        server = self.serve_status() if self.status_port else None
+
+        threads = [threading.Thread(target=self._job_loop, args=(job,), name=f"job-{job.name}", daemon=True)
+                   for job in self.jobs]
+        for thread in threads:
+            thread.start()
+        print(f"🚀 Collector daemon {os.getpid()} running: {', '.join(job.name for job in self.jobs)}")
+
+        try:
+            while not self.stopping.is_set():
+                if not self.lock_alive():
+                    print("❌ Lost the database session holding the daemon lock; stopping")
+                    self.stopping.set()
+                    break
+                self.refresh_queue_depth()
+                self.write_status()
+                self.stopping.wait(self.status_interval)
+
+            for thread in threads:
+                thread.join()
+        finally:
+            self.limiter.save_state()
+            self.write_status()
+            if server:
+                server.shutdown()
+            close_pool()
+            self._lock_conn.close()
+        print("👋 Collector daemon stopped")
+        return 0
+
+
+def build_jobs(names, regions):
+    """Job instances for the requested names, intervals from DAEMON_* settings"""
+    settings = schedule_settings()
+    # Metadata comes from the primary (first) region
+    currency = regions[0]
+    metadata_max_age_days = float(os.getenv("METADATA_MAX_AGE_DAYS", "7"))
+    discovery_pages = int(os.getenv("DAEMON_DISCOVERY_PAGES", "40"))
+
+    def poll_prices():
+        return run_cycle(regions, settings=settings)
+
+    def refresh_metadata():
+        due = get_games_due_for_metadata(metadata_max_age_days)
+        if due:
+            refresh_game_metadata(due, currency)
+
+    def discover_games():
+        app_ids = scrape_top_games(max_pages=discovery_pages)
+        if app_ids:
+            filter_and_add_games(app_ids)
+
+    def compute_forecasts():
+        # run_forecasts returns a series count, not a delay
+        run_forecasts()
+
+    available = {
+        # Price collection holds a writer and a run-checkpoint connection
+        'prices': Job('prices', poll_prices, float(os.getenv("POLL_CYCLE_SECONDS", "300")),
+                      connections=2),
+        'metadata': Job('metadata', refresh_metadata,
+                        float(os.getenv("DAEMON_METADATA_INTERVAL_SECONDS", "3600"))),
+        'discovery': Job('discovery', discover_games,
+                         float(os.getenv("DAEMON_DISCOVERY_INTERVAL_SECONDS", "21600"))),
+        'forecast': Job('forecast', compute_forecasts,
+                        float(os.getenv("DAEMON_FORECAST_INTERVAL_SECONDS", "86400"))),
+    }
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown jobs: {', '.join(unknown)} (choose from {', '.join(available)})")
+    return [available[name] for name in names]
+
+
+if __name__ == "__main__":
+    default_status_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.collector_daemon_status.json')
+    parser = argparse.ArgumentParser(description="Run price, metadata and discovery collection as one service")
+    parser.add_argument('--jobs', default='prices,metadata,discovery,forecast',
+                        help="Comma-separated jobs to run (default: all)")
+    parser.add_argument('--status-file', default=os.getenv("DAEMON_STATUS_FILE", default_status_file))
+    parser.add_argument('--status-port', type=int,
+                        default=int(os.getenv("DAEMON_STATUS_PORT")) if os.getenv("DAEMON_STATUS_PORT") else None,
+                        help="Also serve the status JSON on this local port")
+    args = parser.parse_args()
+
+    try:
+        jobs = build_jobs([name.strip() for name in args.jobs.split(',') if name.strip()],
+                          get_regions())
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    daemon = CollectorDaemon(jobs, args.status_file, args.status_port,
+                             float(os.getenv("DAEMON_STATUS_INTERVAL_SECONDS", "30")))
+    sys.exit(daemon.run())
@@ -0,0 +1,140 @@
+"""
+Database connections for the collectors.
+
+One-shot scripts open a fresh connection per call. A long-running process
+(collector_daemon.py) installs a shared pool with install_pool(); from then
+on get_db_connection() hands out pooled connections whose close() returns
+them to the pool, so the collector code that opens and closes connections
+per task works unchanged.
+"""
+import os
+import sys
+import threading
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+
+# Sessions run in UTC so LOCALTIMESTAMP stamps (price_history, schedules)
+# are naive UTC whatever the server's time zone; the API reads them as such
+SESSION_OPTIONS = '-c TimeZone=UTC'
+
+
+def connection_settings():
+    """psycopg2.connect keyword arguments from the DB_* environment variables"""
+    return {
+        'host': os.getenv("DB_HOST", "localhost"),
+        'database': os.getenv("DB_NAME", "steam_prices"),
+        'user': os.getenv("DB_USER", "steam_user"),
+        'password': os.getenv("DB_PASSWORD"),
+        'port': os.getenv("DB_PORT", "5432"),
+        'options': SESSION_OPTIONS,
+    }
+
+
+class PooledConnection:
+    """
+    A checked-out connection that goes back to its pool on close().
+
+    Everything else is delegated to the underlying psycopg2 connection.
+    """
+
+    def __init__(self, collector_pool, conn):
+        self._collector_pool = collector_pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._collector_pool.putconn(conn)
+
+
+class CollectorPool:
+    """
+    ThreadedConnectionPool whose checkout waits for a free connection.
+
+    psycopg2's pool raises as soon as it is exhausted; collector jobs would
+    rather wait, since they hold connections only briefly. The wait is
+    bounded so threads that each hold one connection while asking for a
+    second fail with PoolError instead of deadlocking.
+
+    Args:
+        maxconn (int): Hard cap on open connections.
+        timeout (float): Seconds getconn() waits for a free connection.
+        **dsn: Keyword arguments passed to ``psycopg2.connect``.
+    """
+
+    def __init__(self, maxconn, timeout=30.0, **dsn):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._pool = pg_pool.ThreadedConnectionPool(1, maxconn, **dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self.in_use = 0
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(
+                f"No database connection free after {self.timeout:g}s ({self.maxconn} in use)"
+            )
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        # The pool rolls back any transaction the caller left open
+        self._pool.putconn(conn, close=conn.closed != 0)
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_pool = None
+
+
+def pool_size():
+    """Connections the shared pool may open (COLLECTOR_DB_POOL_MAX)"""
+    return int(os.getenv("COLLECTOR_DB_POOL_MAX", "8"))
+
+
+def install_pool(maxconn=None):
+    """Serve get_db_connection() from a shared pool for the rest of the process"""
+    global _pool
+    if _pool is None:
+        _pool = CollectorPool(maxconn or pool_size(),
+                              timeout=float(os.getenv("COLLECTOR_DB_POOL_TIMEOUT_SECONDS", "30")),
+                              **connection_settings())
+    return _pool
+
+
+def close_pool():
+    """Close every pooled connection; get_db_connection() connects directly again"""
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+def get_db_connection():
+    """Establish database connection (pooled once install_pool() has run)"""
+    if _pool is not None:
+        return _pool.getconn()
+    try:
+        return psycopg2.connect(**connection_settings())
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,198 @@
+"""
+Vectorized price outlook for the whole catalog.
+
+Every (game, currency) series is laid out as one row of a [series x days]
+matrix of daily prices, so trend, volatility, sale cadence and the chance of
+a price drop are computed for all games at once with array operations
+instead of a Python loop per game. The module only needs NumPy; loading
+histories and storing results is forecast_job.py's business.
+
+The model is a heuristic, not a fitted one:
+
+    trend           least-squares slope of log price over the last
+                    ``trend_days``, as percent per week
+    volatility      standard deviation of daily log returns
+    sale cadence    mean and spread of the gaps between sale starts
+    drop_probability
+                    chance of a drop of more than DROP_THRESHOLD within
+                    ``horizon_days``: the historical drop rate as a Poisson
+                    process, blended (by how regular the sales are) with how
+                    close the game is to its usual next sale
+"""
+import numpy as np
+
+# A day-over-day price decrease larger than this counts as a drop
+DROP_THRESHOLD = 0.01
+# Trend (percent per week) beyond which a price is called falling/rising
+TREND_THRESHOLD = 5.0
+FALLING_PROBABILITY = 0.5
+
+
+def build_daily_grid(series_index, start_day, values, n_series, n_days):
+    """
+    Daily matrix from price intervals.
+
+    Each interval's value holds from its first day until the next interval
+    of the same series starts; days before a series' first observation are
+    NaN. When several intervals start on the same day, the last one given
+    wins, so rows should arrive in observation order.
+
+    Args:
+        series_index (ndarray): Row of each interval.
+        start_day (ndarray): Day (0 = first day of the window) each interval
+            starts; earlier starts are clipped to day 0.
+        values (ndarray): Value of each interval.
+        n_series (int): Rows in the matrix.
+        n_days (int): Days in the window.
+
+    Returns:
+        ndarray: float64 matrix of shape (n_series, n_days).
+    """
+    grid = np.full((n_series, n_days), np.nan)
+    if len(values) == 0:
+        return grid
+
+    cells = np.asarray(series_index, dtype=np.int64) * n_days + np.clip(start_day, 0, n_days - 1)
+    # np.unique keeps the first occurrence: look from the end to keep the last
+    _, from_end = np.unique(cells[::-1], return_index=True)
+    last = len(cells) - 1 - from_end
+    grid.flat[cells[last]] = np.asarray(values, dtype=np.float64)[last]
+    return forward_fill(grid)
+
+
+def forward_fill(grid):
+    """Carry the last non-NaN value of every row forward (leading NaNs stay)"""
+    columns = np.arange(grid.shape[1])
+    source = np.where(np.isnan(grid), 0, columns)
+    np.maximum.accumulate(source, axis=1, out=source)
+    return np.take_along_axis(grid, source, axis=1)
+
+
+def _masked_mean_std(values, mask):
+    """Row-wise mean and standard deviation over the masked entries (NaN if none)"""
+    count = mask.sum(axis=1)
+    safe_count = np.maximum(count, 1)
+    filled = np.where(mask, values, 0.0)
+    mean = filled.sum(axis=1) / safe_count
+    variance = np.where(mask, (values - mean[:, None]) ** 2, 0.0).sum(axis=1) / safe_count
+    empty = count == 0
+    return np.where(empty, np.nan, mean), np.where(empty, np.nan, np.sqrt(variance))
+
+
+def _trend(log_prices, trend_days):
+    """Least-squares slope of log price per day over the last ``trend_days``"""
+    window = log_prices[:, -trend_days:]
+    valid = ~np.isnan(window)
+    x = np.arange(window.shape[1], dtype=np.float64)
+    n = valid.sum(axis=1)
+    sum_x = np.where(valid, x, 0.0).sum(axis=1)
+    sum_y = np.where(valid, window, 0.0).sum(axis=1)
+    sum_xx = np.where(valid, x * x, 0.0).sum(axis=1)
+    sum_xy = np.where(valid, x * window, 0.0).sum(axis=1)
+    denominator = n * sum_xx - sum_x ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * sum_xy - sum_x * sum_y) / denominator
+    return np.where((n >= 2) & (denominator > 0), slope, 0.0)
+
+
+def _sale_cadence(on_sale):
+    """
+    Sale starts (days a discount begins) and the gaps between them.
+
+    Returns:
+        tuple: (start count, mean gap, gap std, day index of the last start),
+        with NaN / -1 where a series has too few starts.
+    """
+    n_series, n_days = on_sale.shape
+    starts = on_sale[:, 1:] & ~on_sale[:, :-1]
+    days = np.arange(1, n_days)
+    count = starts.sum(axis=1)
+
+    # Day of the previous start before each day, via a running maximum
+    marker = np.where(starts, days, -1)
+    last_start_upto = np.maximum.accumulate(marker, axis=1)
+    previous_start = np.concatenate(
+        [np.full((n_series, 1), -1), last_start_upto[:, :-1]], axis=1
+    )
+    is_gap = starts & (previous_start >= 0)
+    gaps = np.where(is_gap, days - previous_start, 0).astype(np.float64)
+    mean_gap, gap_std = _masked_mean_std(gaps, is_gap)
+
+    last_start = last_start_upto[:, -1]
+    return count, mean_gap, gap_std, last_start
+
+
+def compute_forecasts(prices, discounts, horizon_days=14, trend_days=30, volatility_days=90):
+    """
+    Outlook for every row of a daily price matrix.
+
+    Args:
+        prices (ndarray): (n_series, n_days) final prices, NaN before the
+            first observation (see build_daily_grid).
+        discounts (ndarray): Matching discount percentages.
+        horizon_days (int): Window the drop probability refers to.
+        trend_days (int): Days the trend is fitted over.
+        volatility_days (int): Days of returns the volatility is measured over.
+
+    Returns:
+        dict: One array per field, aligned with the matrix rows: history_days,
+        trend_pct_per_week, volatility, sale_count, sale_interval_days,
+        sale_regularity, expected_sale_in_days, on_sale, drop_probability,
+        forecast.
+    """
+    n_series, n_days = prices.shape
+    valid = ~np.isnan(prices)
+    history_days = valid.sum(axis=1)
+    # Zero prices (free weekends, delistings) have no log; treat them as gaps
+    priced = valid & (prices > 0)
+    log_prices = np.log(np.where(priced, prices, np.nan))
+
+    slope = _trend(log_prices, min(trend_days, n_days))
+    trend_pct_per_week = np.expm1(slope * 7) * 100
+
+    returns = np.diff(log_prices[:, -(volatility_days + 1):], axis=1)
+    _, volatility = _masked_mean_std(returns, ~np.isnan(returns))
+
+    # Drop rate: drops per observed day, as a Poisson process over the horizon
+    pairs = valid[:, 1:] & valid[:, :-1]
+    drops = pairs & (prices[:, 1:] < prices[:, :-1] * (1 - DROP_THRESHOLD))
+    drop_rate = drops.sum(axis=1) / np.maximum(pairs.sum(axis=1), 1)
+    p_rate = -np.expm1(-drop_rate * horizon_days)
+
+    on_sale_days = np.nan_to_num(discounts, nan=0.0) > 0
+    on_sale = on_sale_days[:, -1]
+    sale_count, mean_gap, gap_std, last_start = _sale_cadence(on_sale_days)
+    days_since_sale = np.where(last_start >= 0, (n_days - 1) - last_start, np.nan)
+
+    # Regular sales (small spread relative to the gap) make the cycle
+    # trustworthy; irregular ones fall back to the plain drop rate
+    has_cycle = (sale_count >= 2) & (mean_gap > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        regularity = np.where(has_cycle, 1 - np.clip(gap_std / mean_gap, 0, 1), 0.0)
+        spread = np.maximum(np.fmax(gap_std, 0.15 * mean_gap), 1.0)
+        z = (days_since_sale + horizon_days - mean_gap) / spread
+    p_cycle = 1 / (1 + np.exp(-np.clip(np.nan_to_num(z), -50, 50)))
+    use_cycle = has_cycle & ~on_sale
+    drop_probability = np.where(
+        use_cycle, regularity * p_cycle + (1 - regularity) * p_rate, p_rate
+    )
+    expected_sale_in_days = np.where(
+        use_cycle, np.maximum(mean_gap - days_since_sale, 0), np.nan
+    )
+
+    forecast = np.full(n_series, 'stable', dtype=object)
+    forecast[trend_pct_per_week >= TREND_THRESHOLD] = 'rising'
+    forecast[(trend_pct_per_week <= -TREND_THRESHOLD) | (drop_probability >= FALLING_PROBABILITY)] = 'falling'
+
+    return {
+        'history_days': history_days,
+        'trend_pct_per_week': trend_pct_per_week,
+        'volatility': np.nan_to_num(volatility, nan=0.0),
+        'sale_count': sale_count,
+        'sale_interval_days': np.where(has_cycle, mean_gap, np.nan),
+        'sale_regularity': regularity,
+        'expected_sale_in_days': expected_sale_in_days,
+        'on_sale': on_sale,
+        'drop_probability': drop_probability,
+        'forecast': forecast,
+    }
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Batch price outlook for every tracked series.
+
+Loads the last FORECAST_HISTORY_DAYS of price history (intervals from
+price_history, older days from price_history_daily) in one streamed pass,
+lays it out as daily matrices and lets forecast_engine compute trend,
+volatility, sale cadence and drop probability for the whole catalog at once.
+Results replace the contents of price_forecasts, which the API joins onto
+game rows.
+
+Usage:
+    python forecast_job.py [--history-days N] [--horizon-days N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from db_pool import get_db_connection
+from forecast_engine import build_daily_grid, compute_forecasts
+from steam_price_collector import bump_data_version
+
+load_dotenv()
+
+# Raw intervals for recent months, daily closes for what was downsampled.
+# Ordered so that within a series and day the latest observation comes last.
+HISTORY_SQL = """
+    SELECT app_id, currency, day, final_price, discount_percent
+    FROM (
+        SELECT app_id, currency, checked_at::date - %(start)s AS day,
+            final_price, discount_percent, checked_at AS observed_at
+        FROM price_history
+        WHERE last_seen_at >= %(start)s
+            AND checked_at >= date_trunc('month', %(start)s::timestamp)
+            AND currency IS NOT NULL AND final_price IS NOT NULL
+        UNION ALL
+        SELECT app_id, currency, day - %(start)s, close_price, max_discount_percent, day::timestamp
+        FROM price_history_daily
+        WHERE day >= %(start)s
+            AND close_price IS NOT NULL
+    ) h
+    ORDER BY app_id, currency, observed_at
+"""
+
+UPSERT_SQL = """
+    INSERT INTO price_forecasts
+    (app_id, currency, history_days, trend_pct_per_week, volatility, sale_count,
+     sale_interval_days, sale_regularity, expected_sale_in_days, on_sale,
+     drop_probability, forecast, computed_at)
+    VALUES %s
+    ON CONFLICT (app_id, currency) DO UPDATE SET
+        history_days = EXCLUDED.history_days,
+        trend_pct_per_week = EXCLUDED.trend_pct_per_week,
+        volatility = EXCLUDED.volatility,
+        sale_count = EXCLUDED.sale_count,
+        sale_interval_days = EXCLUDED.sale_interval_days,
+        sale_regularity = EXCLUDED.sale_regularity,
+        expected_sale_in_days = EXCLUDED.expected_sale_in_days,
+        on_sale = EXCLUDED.on_sale,
+        drop_probability = EXCLUDED.drop_probability,
+        forecast = EXCLUDED.forecast,
+        computed_at = EXCLUDED.computed_at
+"""
+
+
+def load_histories(conn, history_days, fetch_size=50000):
+    """
+    Stream the history window into flat arrays, one entry per interval.
+
+    Returns:
+        tuple: (keys, series_index, day, final_price, discount) where keys
+        lists the (app_id, currency) of each series index.
+    """
+    start = date.today() - timedelta(days=history_days - 1)
+    keys = []
+    series_index, days, prices, discounts = [], [], [], []
+    last_key = None
+
+    # A named cursor keeps the result set on the server
+    with conn.cursor(name='forecast_history') as cur:
+        cur.itersize = fetch_size
+        cur.execute(HISTORY_SQL, {'start': start})
+        for app_id, currency, day, final_price, discount in cur:
+            key = (app_id, currency)
+            if key != last_key:
+                keys.append(key)
+                last_key = key
+            series_index.append(len(keys) - 1)
+            days.append(day)
+            prices.append(final_price)
+            discounts.append(discount or 0)
+    conn.commit()
+
+    return (keys, np.array(series_index, dtype=np.int64), np.array(days, dtype=np.int64),
+            np.array(prices, dtype=np.float64), np.array(discounts, dtype=np.float64))
+
+
+def forecast_rows(keys, outlook, computed_at):
+    """price_forecasts rows from compute_forecasts output"""
+    def nullable(value, digits):
+        return None if np.isnan(value) else round(float(value), digits)
+
+    for i, (app_id, currency) in enumerate(keys):
+        yield (
+            app_id, currency,
+            int(outlook['history_days'][i]),
+            round(float(outlook['trend_pct_per_week'][i]), 2),
+            round(float(outlook['volatility'][i]), 4),
+            int(outlook['sale_count'][i]),
+            nullable(outlook['sale_interval_days'][i], 1),
+            round(float(outlook['sale_regularity'][i]), 3),
+            nullable(outlook['expected_sale_in_days'][i], 1),
+            bool(outlook['on_sale'][i]),
+            round(float(outlook['drop_probability'][i]), 3),
+            outlook['forecast'][i],
+            computed_at,
+        )
+
+
+def save_forecasts(conn, keys, outlook, page_size=1000):
+    """Replace price_forecasts with this run's results in one transaction"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT LOCALTIMESTAMP")
+        computed_at = cur.fetchone()[0]
+        execute_values(cur, UPSERT_SQL, forecast_rows(keys, outlook, computed_at),
+                       page_size=page_size)
+        # Series that fell out of the window are no longer forecast
+        cur.execute("DELETE FROM price_forecasts WHERE computed_at < %s", (computed_at,))
+        removed = cur.rowcount
+    conn.commit()
+    return removed
+
+
+def run_forecasts(history_days=None, horizon_days=None):
+    """
+    Compute and store the outlook of every series with history in the window.
+
+    Returns:
+        int: Series forecast.
+    """
+    history_days = history_days or int(os.getenv("FORECAST_HISTORY_DAYS", "730"))
+    horizon_days = horizon_days or int(os.getenv("FORECAST_HORIZON_DAYS", "14"))
+    conn = get_db_connection()
+
+    try:
+        started = time.monotonic()
+        keys, series_index, days, prices, discounts = load_histories(conn, history_days)
+        loaded = time.monotonic()
+        if not keys:
+            print("📈 No price history in the forecast window")
+            return 0
+
+        price_grid = build_daily_grid(series_index, days, prices, len(keys), history_days)
+        discount_grid = build_daily_grid(series_index, days, discounts, len(keys), history_days)
+        outlook = compute_forecasts(price_grid, discount_grid, horizon_days=horizon_days)
+        computed = time.monotonic()
+
+        removed = save_forecasts(conn, keys, outlook)
+        falling = int(np.count_nonzero(outlook['forecast'] == 'falling'))
+        print(f"📈 Forecast {len(keys)} series from {len(prices)} intervals "
+              f"(load {loaded - started:.1f}s, compute {computed - loaded:.1f}s, "
+              f"save {time.monotonic() - computed:.1f}s): {falling} likely to drop, "
+              f"{removed} stale removed")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    bump_data_version()
+    return len(keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the price outlook of every tracked game")
+    parser.add_argument('--history-days', type=int, default=None,
+                        help="Days of history to load (default: FORECAST_HISTORY_DAYS or 730)")
+    parser.add_argument('--horizon-days', type=int, default=None,
+                        help="Days the drop probability covers (default: FORECAST_HORIZON_DAYS or 14)")
+    args = parser.parse_args()
+
+    try:
+        run_forecasts(args.history_days, args.horizon_days)
+    except KeyboardInterrupt:
+        print("\n🛑 Forecast interrupted")
+        sys.exit(1)
@@ -1,179 +1,258 @@
-import requests
-from bs4 import BeautifulSoup
-import psycopg2
+import argparse
+import lxml.html
+from psycopg2.extras import execute_values
 import os
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
 
+from db_pool import get_db_connection
+from rate_limiter import get_shared_limiter
+from steam_client import get_shared_client
+from steam_price_collector import bump_data_version, get_regions
+
 load_dotenv()
 
-def get_db_connection():
-    """Establish database connection"""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            database=os.getenv("DB_NAME", "steam_prices"),
-            user=os.getenv("DB_USER", "steam_user"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432")
-        )
-        return conn
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        sys.exit(1)
+# Same adaptive limiter and HTTP client instances the price collector uses
+steam_limiter = get_shared_limiter()
+steam_client = get_shared_client()
+
+# Country code for appdetails: the price collector's primary region unless
+# overridden, so the response cache serves both
+STEAM_COUNTRY = os.getenv("STEAM_COUNTRY") or get_regions()[0]
 
-def get_steam_game_details(app_id):
-    """Check if a game is free-to-play"""
-    url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
+SEARCH_PAGE_SIZE = 25
+
+def get_steam_game_details(app_id, max_retries=3, limiter=None):
+    """
+    Check if a game is free-to-play.
+    
+    Requests the same appdetails document as the price collector (same cc),
+    so with STEAM_CACHE_DIR set the collector reuses it instead of fetching
+    it again.
+    """
+    game_data = steam_client.get_app_details(app_id, STEAM_COUNTRY, max_retries, limiter)
+    if not isinstance(game_data, dict):
+        return None
+    return {'is_free': game_data.get('is_free', False), 'name': game_data.get('name', 'Unknown')}
+
+def extract_app_ids(html):
+    """
+    Pull app IDs out of search result rows.
+    
+    Only the data-ds-appid attributes are needed, so lxml reads them with one
+    XPath query instead of building a full soup. Bundle rows list several
+    comma-separated IDs and are skipped.
+    """
+    if not html or not html.strip():
+        return []
+    tree = lxml.html.fromstring(html)
+    values = tree.xpath('//a[contains(@class, "search_result_row")]/@data-ds-appid')
+    return [int(value) for value in values if value.isdigit()]
+
+def fetch_search_page(page, use_json=True, max_retries=3, limiter=None):
+    """
+    Fetch one page of the top sellers search.
+    
+    The JSON endpoint returns only the result rows (results_html), which is
+    much smaller than the full search page; the HTML page is the fallback.
+    
+    Returns:
+        list: App IDs on the page (empty past the last page), or None on failure.
+    """
+    if use_json:
+        path = '/search/results/'
+        params = {'filter': 'topsellers', 'start': (page - 1) * SEARCH_PAGE_SIZE,
+                  'count': SEARCH_PAGE_SIZE, 'infinite': 1}
+    else:
+        path = '/search/'
+        params = {'filter': 'topsellers', 'page': page}
     
+    response = steam_client.get(path, params, f"search page {page}", max_retries, limiter)
+    if response is None:
+        return None
     try:
-        response = requests.get(url, timeout=10)
+        if not use_json:
+            return extract_app_ids(response.text)
         data = response.json()
-        
-        if data and data[str(app_id)]['success']:
-            game_data = data[str(app_id)]['data']
-            is_free = game_data.get('is_free', False)
-            name = game_data.get('name', 'Unknown')
-            return {'is_free': is_free, 'name': name}
-        return None
+        if not data.get('success'):
+            return None
+        return extract_app_ids(data.get('results_html', ''))
     except Exception as e:
-        print(f"⚠️  Error checking App ID {app_id}: {e}")
+        print(f"❌ Error on page {page}: {e}")
         return None
 
-def scrape_top_games(max_pages=10):
+def scrape_top_games(max_pages=10, workers=None, patience=2, limiter=None):
     """
     Scrape Steam's top sellers to get approximately top 1000 games.
     Each page has ~25 games, so 40 pages = ~1000 games
+    
+    Pages are fetched ``workers`` at a time through the shared limiter and
+    processed in page order. Scraping stops at an empty page or after
+    ``patience`` consecutive pages without a new ID.
     """
-    print(f"\n🔍 Scraping Steam's top sellers (up to {max_pages * 25} games)...")
+    workers = workers or int(os.getenv("STEAM_WORKERS", "4"))
+    limiter = limiter or steam_limiter
+    use_json = os.getenv("STEAM_SEARCH_JSON", "true").lower() in ('1', 'true', 'yes')
+    print(f"\n🔍 Scraping Steam's top sellers (up to {max_pages * SEARCH_PAGE_SIZE} games, {workers} workers)...")
     
-    all_app_ids = []
+    # Dict keys keep first-seen order while removing duplicates
+    seen = {}
+    stale_pages = 0
+    next_page = 1
+    done = False
     
-    for page in range(1, max_pages + 1):
-        url = f"https://store.steampowered.com/search/?filter=topsellers&page={page}"
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            games = soup.find_all('a', {'class': 'search_result_row'})
-            
-            if not games:
-                print(f"⚠️  No games found on page {page}, stopping...")
-                break
-            
-            for game in games:
-                app_id = game.get('data-ds-appid')
-                if app_id:
-                    all_app_ids.append(int(app_id))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while not done and next_page <= max_pages:
+            pages = range(next_page, min(next_page + workers, max_pages + 1))
+            next_page = pages[-1] + 1
+            futures = [executor.submit(fetch_search_page, page, use_json, limiter=limiter) for page in pages]
             
-            print(f"✓ Page {page}/{max_pages}: Found {len(games)} games (Total: {len(all_app_ids)})")
-            
-            # Be nice to Steam's servers
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"❌ Error on page {page}: {e}")
-            continue
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_app_ids = []
-    for app_id in all_app_ids:
-        if app_id not in seen:
-            seen.add(app_id)
-            unique_app_ids.append(app_id)
+            for page, future in zip(pages, futures):
+                app_ids = future.result()
+                if app_ids is None and use_json:
+                    # The JSON endpoint is unofficial; fall back to the HTML page
+                    app_ids = fetch_search_page(page, use_json=False, limiter=limiter)
+                if app_ids is None:
+                    continue
+                if not app_ids:
+                    print(f"⚠️  No games found on page {page}, stopping...")
+                    done = True
+                    break
+                
+                new_ids = [app_id for app_id in app_ids if app_id not in seen]
+                seen.update(dict.fromkeys(new_ids))
+                print(f"✓ Page {page}/{max_pages}: Found {len(app_ids)} games, {len(new_ids)} new (Total: {len(seen)})")
+                
+                stale_pages = 0 if new_ids else stale_pages + 1
+                if stale_pages >= patience:
+                    print(f"⚠️  {stale_pages} pages without new games, stopping...")
+                    done = True
+                    break
     
+    unique_app_ids = list(seen)
     print(f"\n✅ Scraped {len(unique_app_ids)} unique games")
     return unique_app_ids
 
-def filter_and_add_games(app_ids):
+def save_new_games(cur, probed):
+    """
+    Insert probed games in bulk.
+    
+    Free-to-play games are recorded too (is_free_to_play = TRUE) so later
+    runs recognise them without probing Steam again; only paid games get a
+    games row for the price collector.
+    
+    Args:
+        cur: Open cursor; the caller owns the transaction.
+        probed (list): (app_id, details) pairs from get_steam_game_details.
+    """
+    execute_values(cur, """
+        INSERT INTO games_to_track (app_id, source, is_free_to_play, status)
+        VALUES %s
+        ON CONFLICT (app_id) DO UPDATE
+        SET last_seen_in_top = CURRENT_TIMESTAMP
+    """, [(app_id, 'top_sellers', details['is_free'], 'active') for app_id, details in probed])
+    
+    # Add basic info to games table (full details will be collected by price collector)
+    paid = [(app_id, details['name']) for app_id, details in probed if not details['is_free']]
+    if paid:
+        execute_values(cur, """
+            INSERT INTO games (app_id, name, last_updated)
+            VALUES %s
+            ON CONFLICT (app_id) DO UPDATE SET 
+                name = EXCLUDED.name,
+                last_updated = CURRENT_TIMESTAMP
+        """, paid, template="(%s, %s, CURRENT_TIMESTAMP)")
+
+def filter_and_add_games(app_ids, workers=None, limiter=None):
     """
     Check each game to see if it's free-to-play and add to tracking list.
     Only adds non-free games.
+    
+    Known IDs are resolved and marked as seen in one statement; only the
+    unknown ones are probed on Steam, concurrently through the shared limiter.
     """
+    workers = workers or int(os.getenv("STEAM_WORKERS", "4"))
+    limiter = limiter or steam_limiter
     conn = get_db_connection()
     cur = conn.cursor()
     
     added_count = 0
     skipped_free = 0
-    already_tracked = 0
     failed_count = 0
     
     print(f"\n🎮 Processing {len(app_ids)} games...")
-    print("This will take a while (checking each game individually)...\n")
     
-    for idx, app_id in enumerate(app_ids, 1):
-        # Check if already in tracking list
-        cur.execute("SELECT app_id, is_free_to_play FROM games_to_track WHERE app_id = %s", (app_id,))
-        existing = cur.fetchone()
-        
-        if existing:
-            # Update last_seen_in_top timestamp
-            cur.execute("""
-                UPDATE games_to_track 
-                SET last_seen_in_top = CURRENT_TIMESTAMP 
-                WHERE app_id = %s
-            """, (app_id,))
-            already_tracked += 1
-            
-            if idx % 50 == 0:
-                print(f"Progress: {idx}/{len(app_ids)} - Already tracking: {already_tracked}, New: {added_count}, Skipped (free): {skipped_free}")
-            continue
-        
-        # Get game details from Steam API
-        details = get_steam_game_details(app_id)
-        
-        if details is None:
-            failed_count += 1
-            continue
-        
-        # Skip free-to-play games
-        if details['is_free']:
-            skipped_free += 1
-            print(f"⊗ Skipping {details['name']} (App ID: {app_id}) - Free to play")
-            continue
-        
-        # Add to tracking list
+    # Mark every already-tracked ID as seen, learning which ones they are
+    cur.execute("""
+        UPDATE games_to_track
+        SET last_seen_in_top = CURRENT_TIMESTAMP
+        WHERE app_id = ANY(%s)
+        RETURNING app_id
+    """, (list(app_ids),))
+    known = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    already_tracked = len(known)
+    
+    new_ids = [app_id for app_id in app_ids if app_id not in known]
+    print(f"Already tracking: {already_tracked} | Probing {len(new_ids)} new games ({workers} workers)...\n")
+    
+    pending = []
+    
+    def flush():
+        nonlocal added_count, failed_count
+        if not pending:
+            return
         try:
-            cur.execute("""
-                INSERT INTO games_to_track (app_id, source, is_free_to_play, status)
-                VALUES (%s, 'top_sellers', %s, 'active')
-                ON CONFLICT (app_id) DO UPDATE 
-                SET last_seen_in_top = CURRENT_TIMESTAMP
-            """, (app_id, details['is_free']))
-            
-            # Add basic info to games table (full details will be collected by price collector)
-            cur.execute("""
-                INSERT INTO games (app_id, name, last_updated)
-                VALUES (%s, %s, CURRENT_TIMESTAMP)
-                ON CONFLICT (app_id) DO UPDATE SET 
-                    name = EXCLUDED.name,
-                    last_updated = CURRENT_TIMESTAMP
-            """, (app_id, details['name']))
-            
+            save_new_games(cur, pending)
             conn.commit()
-            added_count += 1
-            print(f"✓ Added: {details['name']} (App ID: {app_id})")
-            
+            added_count += sum(1 for _, details in pending if not details['is_free'])
         except Exception as e:
-            print(f"❌ Error adding App ID {app_id}: {e}")
+            print(f"❌ Error adding {len(pending)} games: {e}")
             conn.rollback()
-            failed_count += 1
-        
-        # Progress update every 50 games
-        if idx % 50 == 0:
-            print(f"\n--- Progress: {idx}/{len(app_ids)} ---")
-            print(f"Added: {added_count} | Already tracked: {already_tracked} | Skipped (free): {skipped_free} | Failed: {failed_count}\n")
+            failed_count += len(pending)
+        pending.clear()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(get_steam_game_details, app_id, limiter=limiter): app_id
+            for app_id in new_ids
+        }
         
-        # Rate limiting - be nice to Steam's API
-        time.sleep(1.5)
+        for idx, future in enumerate(as_completed(futures), 1):
+            app_id = futures[future]
+            try:
+                details = future.result()
+            except Exception as e:
+                print(f"⚠️  Error checking App ID {app_id}: {e}")
+                details = None
+            
+            if details is None:
+                failed_count += 1
+            elif details['is_free']:
+                skipped_free += 1
+                pending.append((app_id, details))
+                print(f"⊗ Skipping {details['name']} (App ID: {app_id}) - Free to play")
+            else:
+                pending.append((app_id, details))
+                print(f"✓ Added: {details['name']} (App ID: {app_id})")
+            
+            if len(pending) >= 50:
+                flush()
+            
+            # Progress update every 50 games
+            if idx % 50 == 0:
+                print(f"\n--- Progress: {idx}/{len(new_ids)} ---")
+                print(f"Added: {added_count} | Already tracked: {already_tracked} | Skipped (free): {skipped_free} | Failed: {failed_count}\n")
     
+    flush()
     cur.close()
     conn.close()
+    limiter.save_state()
+    
+    if added_count:
+        bump_data_version()
     
     print(f"\n{'='*60}")
     print(f"✅ SUMMARY")
@@ -223,7 +302,50 @@ def get_tracked_game_ids():
         cur.close()
         conn.close()
 
+def get_games_due_for_metadata(max_age_days=7):
+    """
+    Get tracked game IDs whose metadata has never been fetched or is older
+    than ``max_age_days``, oldest first.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            SELECT t.app_id
+            FROM games_to_track t
+            LEFT JOIN games g ON g.app_id = t.app_id
+            WHERE t.status = 'active' AND t.is_free_to_play = FALSE
+                AND (
+                    t.metadata_checked_at IS NULL
+                    OR GREATEST(t.metadata_checked_at, g.last_updated)
+                        < NOW() - make_interval(secs => %s)
+                )
+            ORDER BY t.metadata_checked_at NULLS FIRST
+        """, (max_age_days * 86400,))
+        return [row[0] for row in cur.fetchall()]
+    except Exception as e:
+        print(f"❌ Error fetching games due for metadata refresh: {e}")
+        return []
+    finally:
+        cur.close()
+        conn.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the list of tracked games from Steam's top sellers")
+    parser.add_argument('--pages', type=int, default=40,
+                        help="Search pages to scrape, 25 games each (default: 40)")
+    parser.add_argument('--scrape-only', action='store_true',
+                        help="Scrape and print the IDs without touching the database")
+    args = parser.parse_args()
+    
+    if args.scrape_only:
+        start_time = datetime.now()
+        app_ids = scrape_top_games(max_pages=args.pages)
+        print(f"⏱️  {(datetime.now() - start_time).total_seconds():.1f}s")
+        print(app_ids)
+        sys.exit(0)
+    
     print("🎮 Steam Game List Manager")
     print("="*60)
     
@@ -232,7 +354,7 @@ if __name__ == "__main__":
     print(f"Currently tracking: {stats['active']} active games (of {stats['total']} total)")
     
     # Scrape top games from Steam (40 pages ≈ 1000 games)
-    app_ids = scrape_top_games(max_pages=40)
+    app_ids = scrape_top_games(max_pages=args.pages)
     
     if not app_ids:
         print("❌ No games found. Exiting.")
@@ -243,4 +365,4 @@ if __name__ == "__main__":
     
     # Show final stats
     final_stats = get_tracked_games_count()
-    print(f"\n🎯 Now tracking: {final_stats['active']} active non-free games")
\ No newline at end of file
+    print(f"\n🎯 Now tracking: {final_stats['active']} active non-free games")
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Database maintenance commands for the price tables.
+
+Usage:
+    python maintenance.py rebuild-current-prices
+    python maintenance.py rebuild-price-stats
+    python maintenance.py expire-price-stats     (run nightly)
+    python maintenance.py assess-prices
+    python maintenance.py create-partitions      (run monthly, or more often)
+    python maintenance.py downsample-history [--older-than-months N] [--drop]
+    python maintenance.py run-report [--limit N]
+    python maintenance.py prune-runs [--keep-days N]
+    python maintenance.py add-sale-window NAME START END
+"""
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+from dotenv import load_dotenv
+
+from db_pool import get_db_connection
+from price_writer import ASSESS_ALL_SQL
+from steam_price_collector import bump_data_version
+
+load_dotenv()
+
+def rebuild_current_prices():
+    """Recompute current_prices from the latest price_history interval per game/currency"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    start_time = datetime.now()
+
+    try:
+        cur.execute("""
+            INSERT INTO current_prices
+            (app_id, currency, initial_price, final_price, discount_percent, checked_at,
+             history_id, history_checked_at)
+            SELECT DISTINCT ON (app_id, currency)
+                app_id, currency, initial_price, final_price, discount_percent, last_seen_at,
+                id, checked_at
+            FROM price_history
+            WHERE currency IS NOT NULL AND last_seen_at IS NOT NULL
+            ORDER BY app_id, currency, checked_at DESC, id DESC
+            ON CONFLICT (app_id, currency) DO UPDATE SET
+                initial_price = EXCLUDED.initial_price,
+                final_price = EXCLUDED.final_price,
+                discount_percent = EXCLUDED.discount_percent,
+                checked_at = EXCLUDED.checked_at,
+                history_id = EXCLUDED.history_id,
+                history_checked_at = EXCLUDED.history_checked_at
+        """)
+        upserted = cur.rowcount
+
+        # Drop snapshots whose history has been removed
+        cur.execute("""
+            DELETE FROM current_prices cp
+            WHERE NOT EXISTS (
+                SELECT 1 FROM price_history ph
+                WHERE ph.app_id = cp.app_id AND ph.currency = cp.currency
+            )
+        """)
+        removed = cur.rowcount
+        cur.execute(ASSESS_ALL_SQL)
+
+        conn.commit()
+        elapsed = (datetime.now() - start_time).total_seconds()
+        print(f"✅ Rebuilt current_prices: {upserted} rows upserted, {removed} removed ({elapsed:.1f}s)")
+        bump_data_version()
+    except Exception as e:
+        print(f"❌ Error rebuilding current_prices: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def refresh_90_day_lows(cur, expired_only=True):
+    """
+    Recompute price_stats.low_90d from the intervals seen in the last 90 days.
+    
+    Args:
+        cur: Open cursor; the caller owns the transaction.
+        expired_only (bool): Only touch rows whose low was observed more than
+            90 days ago. Rows still inside the window are already correct.
+        
+    Returns:
+        int: Number of price_stats rows refreshed.
+    """
+    if expired_only:
+        cur.execute("""
+            UPDATE price_stats
+            SET low_90d = NULL, low_90d_at = NULL
+            WHERE low_90d_at < NOW() - INTERVAL '90 days'
+        """)
+    else:
+        cur.execute("UPDATE price_stats SET low_90d = NULL, low_90d_at = NULL")
+    
+    # Only rows cleared above (or never set) need the window scan
+    cur.execute("""
+        UPDATE price_stats ps
+        SET low_90d = w.final_price, low_90d_at = w.last_seen_at
+        FROM (
+            SELECT DISTINCT ON (ph.app_id, ph.currency)
+                ph.app_id, ph.currency, ph.final_price, ph.last_seen_at
+            FROM price_history ph
+            JOIN price_stats s ON s.app_id = ph.app_id AND s.currency = ph.currency
+            WHERE s.low_90d IS NULL
+                AND ph.last_seen_at >= NOW() - INTERVAL '90 days'
+                AND ph.checked_at >= date_trunc('month', NOW() - INTERVAL '90 days')
+                AND ph.final_price IS NOT NULL
+            ORDER BY ph.app_id, ph.currency, ph.final_price ASC, ph.last_seen_at DESC
+        ) w
+        WHERE ps.app_id = w.app_id AND ps.currency = w.currency
+    """)
+    return cur.rowcount
+
+def rebuild_price_stats():
+    """Recompute every price_stats row from price_history plus its daily rollups"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    start_time = datetime.now()
+
+    try:
+        cur.execute("""
+            INSERT INTO price_stats
+            (app_id, currency, all_time_low, all_time_high, price_sum, observation_count, last_discount_at, updated_at)
+            SELECT
+                app_id,
+                currency,
+                MIN(low),
+                MAX(high),
+                SUM(total),
+                SUM(observations),
+                MAX(seen_at) FILTER (WHERE discount_percent > 0),
+                MAX(seen_at)
+            FROM (
+                SELECT app_id, currency, final_price AS low, final_price AS high,
+                    final_price::bigint * observation_count AS total,
+                    observation_count AS observations, discount_percent, last_seen_at AS seen_at
+                FROM price_history
+                WHERE currency IS NOT NULL AND final_price IS NOT NULL
+                UNION ALL
+                SELECT app_id, currency, min_price, max_price, price_sum,
+                    observation_count, max_discount_percent, day::timestamp
+                FROM price_history_daily
+            ) observations
+            GROUP BY app_id, currency
+            ON CONFLICT (app_id, currency) DO UPDATE SET
+                all_time_low = EXCLUDED.all_time_low,
+                all_time_high = EXCLUDED.all_time_high,
+                price_sum = EXCLUDED.price_sum,
+                observation_count = EXCLUDED.observation_count,
+                last_discount_at = EXCLUDED.last_discount_at,
+                updated_at = EXCLUDED.updated_at
+        """)
+        upserted = cur.rowcount
+        refreshed = refresh_90_day_lows(cur, expired_only=False)
+        cur.execute(ASSESS_ALL_SQL)
+
+        conn.commit()
+        elapsed = (datetime.now() - start_time).total_seconds()
+        print(f"✅ Rebuilt price_stats: {upserted} rows, {refreshed} with a 90-day low ({elapsed:.1f}s)")
+        bump_data_version()
+    except Exception as e:
+        print(f"❌ Error rebuilding price_stats: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def expire_price_stats():
+    """
+    Nightly job: recompute 90-day lows whose source observation aged out,
+    then re-grade every price, since grades and 7-day forecasts age too.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        refreshed = refresh_90_day_lows(cur, expired_only=True)
+        cur.execute(ASSESS_ALL_SQL)
+        assessed = cur.rowcount
+        conn.commit()
+        print(f"✅ Refreshed {refreshed} expired 90-day lows, re-assessed {assessed} prices")
+        bump_data_version()
+    except Exception as e:
+        print(f"❌ Error expiring price_stats: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def assess_prices():
+    """Recompute price_grade and forecast for every current price"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    start_time = datetime.now()
+
+    try:
+        cur.execute(ASSESS_ALL_SQL)
+        assessed = cur.rowcount
+        conn.commit()
+        elapsed = (datetime.now() - start_time).total_seconds()
+        print(f"✅ Assessed {assessed} prices ({elapsed:.1f}s)")
+        bump_data_version()
+    except Exception as e:
+        print(f"❌ Error assessing prices: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def create_partitions(months_ahead):
+    """Make sure monthly price_history partitions exist from this month onwards"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT ensure_price_history_partitions(
+                CURRENT_DATE, (CURRENT_DATE + make_interval(months => %s))::date
+            )
+        """, (months_ahead,))
+        created = cur.fetchone()[0]
+        conn.commit()
+        print(f"✅ Created {created} price_history partitions ({months_ahead} months ahead)")
+    except Exception as e:
+        print(f"❌ Error creating partitions: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def downsample_history(older_than_months, drop=False):
+    """
+    Roll old price_history partitions up into price_history_daily and detach them.
+    
+    Each partition is handled in its own transaction. Detached partitions are
+    left as standalone tables for archiving (pg_dump -t) unless ``drop`` is set.
+    
+    Args:
+        older_than_months (int): Partitions for months before the current
+            month minus this many months are downsampled.
+        drop (bool): Drop detached partitions instead of keeping them.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'price_history'::regclass
+                AND c.relname ~ '^price_history_[0-9]{4}_[0-9]{2}$'
+                AND to_date(substring(c.relname from 15), 'YYYY_MM')
+                    < date_trunc('month', CURRENT_DATE) - make_interval(months => %s)
+            ORDER BY c.relname
+        """, (older_than_months,))
+        partitions = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        if not partitions:
+            print(f"✅ No price_history partitions older than {older_than_months} months")
+            return
+
+        for partition in partitions:
+            if not re.fullmatch(r'price_history_\d{4}_\d{2}', partition):
+                continue
+            start_time = datetime.now()
+            cur.execute(f"""
+                INSERT INTO price_history_daily (
+                    app_id, currency, day, min_price, max_price, close_price,
+                    max_discount_percent, price_sum, observation_count
+                )
+                SELECT
+                    h.app_id,
+                    h.currency,
+                    d.day::date,
+                    MIN(h.final_price),
+                    MAX(h.final_price),
+                    (array_agg(h.final_price ORDER BY h.checked_at DESC))[1],
+                    MAX(h.discount_percent),
+                    COALESCE(SUM(h.final_price::bigint * h.observation_count)
+                        FILTER (WHERE h.checked_at::date = d.day::date), 0),
+                    COALESCE(SUM(h.observation_count)
+                        FILTER (WHERE h.checked_at::date = d.day::date), 0)
+                FROM {partition} h
+                CROSS JOIN LATERAL generate_series(
+                    h.checked_at::date, COALESCE(h.last_seen_at, h.checked_at)::date, INTERVAL '1 day'
+                ) AS d(day)
+                WHERE h.currency IS NOT NULL AND h.final_price IS NOT NULL
+                GROUP BY h.app_id, h.currency, d.day
+                ON CONFLICT (app_id, currency, day) DO UPDATE SET
+                    min_price = EXCLUDED.min_price,
+                    max_price = EXCLUDED.max_price,
+                    close_price = EXCLUDED.close_price,
+                    max_discount_percent = EXCLUDED.max_discount_percent,
+                    price_sum = EXCLUDED.price_sum,
+                    observation_count = EXCLUDED.observation_count
+            """)
+            days = cur.rowcount
+            cur.execute(f"ALTER TABLE price_history DETACH PARTITION {partition}")
+            if drop:
+                cur.execute(f"DROP TABLE {partition}")
+            conn.commit()
+
+            elapsed = (datetime.now() - start_time).total_seconds()
+            action = "dropped" if drop else "detached"
+            print(f"✅ {partition}: {days} daily rows, partition {action} ({elapsed:.1f}s)")
+    except Exception as e:
+        print(f"❌ Error downsampling price_history: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def run_report(limit=20):
+    """Print recent collection runs and per-kind throughput for capacity planning"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT id, kind, currency, status, started_at,
+                EXTRACT(EPOCH FROM COALESCE(finished_at, last_checkpoint_at) - started_at),
+                total_items, succeeded, failed, resumes
+            FROM collection_runs
+            ORDER BY started_at DESC
+            LIMIT %s
+        """, (limit,))
+        runs = cur.fetchall()
+
+        print(f"{'Run':>6}  {'Kind':<7} {'Cur':<4} {'Status':<12} {'Started':<17} "
+              f"{'Minutes':>8} {'Items':>6} {'OK':>6} {'Failed':>6} {'Games/min':>9} {'Resumes':>7}")
+        for run_id, kind, currency, status, started_at, seconds, total, succeeded, failed, resumes in runs:
+            minutes = float(seconds) / 60 if seconds else None
+            rate = f"{succeeded / minutes:.0f}" if minutes else '-'
+            print(f"{run_id:>6}  {kind:<7} {currency or '-':<4} {status:<12} "
+                  f"{started_at.strftime('%Y-%m-%d %H:%M'):<17} "
+                  f"{f'{minutes:.1f}' if minutes is not None else '-':>8} {total or 0:>6} "
+                  f"{succeeded:>6} {failed:>6} {rate:>9} {resumes:>7}")
+
+        # Completed runs over the last 30 days, for sizing schedules and workers
+        cur.execute("""
+            SELECT kind, COUNT(*),
+                AVG(EXTRACT(EPOCH FROM finished_at - started_at)) / 60,
+                MAX(EXTRACT(EPOCH FROM finished_at - started_at)) / 60,
+                SUM(succeeded) / NULLIF(SUM(EXTRACT(EPOCH FROM finished_at - started_at)) / 60, 0)
+            FROM collection_runs
+            WHERE status = 'completed' AND started_at >= NOW() - INTERVAL '30 days'
+            GROUP BY kind
+            ORDER BY kind
+        """)
+        print(f"\nLast 30 days (completed runs):")
+        for kind, count, avg_minutes, max_minutes, rate in cur.fetchall():
+            print(f"  {kind:<7} {count} runs, avg {avg_minutes:.1f} min, max {max_minutes:.1f} min, "
+                  f"{rate or 0:.0f} games/min")
+    finally:
+        cur.close()
+        conn.close()
+
+def prune_runs(keep_days):
+    """Delete per-game progress of runs older than ``keep_days``; run totals are kept"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            DELETE FROM collection_run_items i
+            USING collection_runs r
+            WHERE i.run_id = r.id AND r.started_at < NOW() - make_interval(days => %s)
+        """, (keep_days,))
+        removed = cur.rowcount
+        conn.commit()
+        print(f"✅ Removed {removed} run items older than {keep_days} days")
+    except Exception as e:
+        print(f"❌ Error pruning collection runs: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+def add_sale_window(name, starts_at, ends_at):
+    """Record a store-wide sale so poll_scheduler.py checks prices more often during it"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            INSERT INTO sale_windows (name, starts_at, ends_at)
+            VALUES (%s, %s, %s)
+            RETURNING id
+        """, (name, starts_at, ends_at))
+        window_id = cur.fetchone()[0]
+        conn.commit()
+        print(f"✅ Sale window {window_id} '{name}': {starts_at} → {ends_at}")
+    except Exception as e:
+        print(f"❌ Error adding sale window: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="deal-forge database maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild-current-prices', help="Backfill current_prices from price_history")
+    subparsers.add_parser('rebuild-price-stats', help="Recompute price_stats from price_history")
+    subparsers.add_parser('expire-price-stats', help="Refresh 90-day lows that fell out of the window")
+    subparsers.add_parser('assess-prices', help="Recompute price grades and forecasts")
+    partitions_parser = subparsers.add_parser('create-partitions', help="Create upcoming monthly price_history partitions")
+    partitions_parser.add_argument('--months-ahead', type=int,
+                                   default=int(os.getenv("PRICE_HISTORY_PARTITIONS_AHEAD", "3")))
+    downsample_parser = subparsers.add_parser('downsample-history',
+                                              help="Roll old partitions up to daily rows and detach them")
+    downsample_parser.add_argument('--older-than-months', type=int,
+                                   default=int(os.getenv("PRICE_HISTORY_RETENTION_MONTHS", "12")))
+    downsample_parser.add_argument('--drop', action='store_true',
+                                   help="Drop detached partitions instead of keeping them for archiving")
+    report_parser = subparsers.add_parser('run-report', help="Show collection run history and throughput")
+    report_parser.add_argument('--limit', type=int, default=20)
+    prune_parser = subparsers.add_parser('prune-runs', help="Delete per-game progress of old collection runs")
+    prune_parser.add_argument('--keep-days', type=int, default=30)
+    sale_parser = subparsers.add_parser('add-sale-window', help="Record a store-wide sale for the poll scheduler")
+    sale_parser.add_argument('name')
+    sale_parser.add_argument('starts_at', type=datetime.fromisoformat, help="e.g. 2026-06-25T17:00")
+    sale_parser.add_argument('ends_at', type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    if args.command == 'rebuild-current-prices':
+        rebuild_current_prices()
+    elif args.command == 'rebuild-price-stats':
+        rebuild_price_stats()
+    elif args.command == 'expire-price-stats':
+        expire_price_stats()
+    elif args.command == 'assess-prices':
+        assess_prices()
+    elif args.command == 'create-partitions':
+        create_partitions(args.months_ahead)
+    elif args.command == 'downsample-history':
+        downsample_history(args.older_than_months, drop=args.drop)
+    elif args.command == 'run-report':
+        run_report(args.limit)
+    elif args.command == 'prune-runs':
+        prune_runs(args.keep_days)
+    elif args.command == 'add-sale-window':
+        add_sale_window(args.name, args.starts_at, args.ends_at)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Priority-based price polling.
+
+Every tracked game carries a next_due_at. After a poll it is pushed out by an
+interval that shrinks for games that are interesting to watch right now:
+
+    interval = POLL_BASE_INTERVAL_HOURS
+        x POLL_DISCOUNT_FACTOR       while the game is discounted
+        x 0.5                        if it was discounted in the last 30 days
+        / (1 + price changes in the last 90 days / 3)
+        / (1 + log10(1 + recommendations) / 3)
+        x POLL_SALE_WINDOW_FACTOR    during (or a day before) a sale window
+
+clamped to [POLL_MIN_INTERVAL_HOURS, POLL_MAX_INTERVAL_HOURS]. The loop
+polls the most overdue games first, as many per cycle as the learned request
+rate allows, so the same request budget keeps the interesting prices fresher.
+
+Usage:
+    python poll_scheduler.py [--once] [--cycle-seconds N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+from db_pool import get_db_connection
+from steam_price_collector import collect_price_overviews, get_regions, steam_limiter
+
+load_dotenv()
+
+RESCHEDULE_SQL = """
+    UPDATE games_to_track t
+    SET last_polled_at = LOCALTIMESTAMP,
+        next_due_at = LOCALTIMESTAMP + make_interval(secs => s.interval_hours * 3600)
+    FROM (
+        SELECT t.app_id,
+            LEAST(GREATEST(
+                %(base_hours)s
+                * CASE WHEN COALESCE(cp.discount_percent, 0) > 0 THEN %(discount_factor)s ELSE 1 END
+                * CASE WHEN ps.last_discount_at >= LOCALTIMESTAMP - INTERVAL '30 days' THEN 0.5 ELSE 1 END
+                / (1 + COALESCE(v.changes, 0) / 3.0)
+                / (1 + LOG(1 + COALESCE(g.recommendation_count, 0)::float8) / 3.0)
+                * CASE WHEN EXISTS (
+                    SELECT 1 FROM sale_windows w
+                    WHERE w.ends_at >= LOCALTIMESTAMP
+                        AND w.starts_at - INTERVAL '1 day' <= LOCALTIMESTAMP
+                  ) THEN %(sale_factor)s ELSE 1 END,
+                %(min_hours)s), %(max_hours)s) AS interval_hours
+        FROM games_to_track t
+        LEFT JOIN games g ON g.app_id = t.app_id
+        -- current_prices is keyed by the currency Steam reported (USD, EUR...),
+        -- so take the game's most recently polled one
+        LEFT JOIN LATERAL (
+            SELECT currency, discount_percent
+            FROM current_prices
+            WHERE app_id = t.app_id
+            ORDER BY checked_at DESC
+            LIMIT 1
+        ) cp ON TRUE
+        LEFT JOIN price_stats ps ON ps.app_id = t.app_id AND ps.currency = cp.currency
+        LEFT JOIN LATERAL (
+            SELECT GREATEST(COUNT(DISTINCT h.final_price) - 1, 0) AS changes
+            FROM price_history h
+            WHERE h.app_id = t.app_id AND h.currency = cp.currency
+                AND h.last_seen_at >= LOCALTIMESTAMP - INTERVAL '90 days'
+                AND h.checked_at >= date_trunc('month', LOCALTIMESTAMP - INTERVAL '90 days')
+        ) v ON TRUE
+        WHERE t.app_id = ANY(%(app_ids)s)
+    ) s
+    WHERE t.app_id = s.app_id
+"""
+
+
+def schedule_settings():
+    """Interval bounds and weights from the POLL_* environment variables"""
+    return {
+        'base_hours': float(os.getenv("POLL_BASE_INTERVAL_HOURS", "24")),
+        'min_hours': float(os.getenv("POLL_MIN_INTERVAL_HOURS", "2")),
+        'max_hours': float(os.getenv("POLL_MAX_INTERVAL_HOURS", "72")),
+        'discount_factor': float(os.getenv("POLL_DISCOUNT_FACTOR", "0.25")),
+        'sale_factor': float(os.getenv("POLL_SALE_WINDOW_FACTOR", "0.25")),
+    }
+
+
+def poll_budget(cycle_seconds, limiter=None, batch_size=None):
+    """
+    Games one cycle can poll within the learned request rate.
+
+    Price-only requests cover ``batch_size`` games each; POLL_BUDGET_SHARE
+    keeps headroom for single-ID retries and other collectors.
+    """
+    limiter = limiter or steam_limiter
+    batch_size = batch_size or int(os.getenv("STEAM_PRICE_BATCH_SIZE", "50"))
+    share = float(os.getenv("POLL_BUDGET_SHARE", "0.8"))
+    return max(int(limiter.rate * cycle_seconds * share) * batch_size, batch_size)
+
+
+def get_due_games(limit):
+    """Active non-free games that are due, never-scheduled and most overdue first"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT app_id
+            FROM games_to_track
+            WHERE status = 'active' AND is_free_to_play = FALSE
+                AND (next_due_at IS NULL OR next_due_at <= LOCALTIMESTAMP)
+            ORDER BY next_due_at NULLS FIRST
+            LIMIT %s
+        """, (limit,))
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def seconds_until_next_due():
+    """Seconds until the next game falls due, or None if nothing is scheduled"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT EXTRACT(EPOCH FROM MIN(next_due_at) - LOCALTIMESTAMP)
+            FROM games_to_track
+            WHERE status = 'active' AND is_free_to_play = FALSE
+        """)
+        seconds = cur.fetchone()[0]
+        return max(float(seconds), 0) if seconds is not None else None
+    finally:
+        cur.close()
+        conn.close()
+
+
+def reschedule(app_ids, failed_ids=(), settings=None):
+    """
+    Set next_due_at for games that were just polled.
+
+    Games whose poll failed come back after the minimum interval instead of
+    their computed one.
+    """
+    settings = settings or schedule_settings()
+    failed_ids = list(failed_ids)
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(RESCHEDULE_SQL, dict(settings, app_ids=list(app_ids)))
+        rescheduled = cur.rowcount
+        if failed_ids:
+            cur.execute("""
+                UPDATE games_to_track
+                SET next_due_at = LOCALTIMESTAMP + make_interval(secs => %s)
+                WHERE app_id = ANY(%s)
+            """, (settings['min_hours'] * 3600, failed_ids))
+        conn.commit()
+        return rescheduled
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_cycle(regions=None, cycle_seconds=None, settings=None):
+    """
+    Poll the most overdue games up to one cycle's request budget, in every
+    region (STEAM_REGIONS by default).
+
+    Returns:
+        float: Seconds to wait before the next cycle. When nothing more is
+        due that is until the next game falls due, at most one cycle.
+    """
+    cycle_seconds = cycle_seconds or float(os.getenv("POLL_CYCLE_SECONDS", "300"))
+    settings = settings or schedule_settings()
+    regions = regions or get_regions()
+    started = time.monotonic()
+    # Each region costs its own requests
+    budget = max(poll_budget(cycle_seconds) // len(regions), 1)
+    due = get_due_games(budget)
+
+    if due:
+        print(f"🗓️  {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: {len(due)} games due "
+              f"(budget {budget} at {steam_limiter.rate:.2f} req/s)")
+        # The due set is recomputed every cycle, so never resume an older run
+        failed = collect_price_overviews(due, limiter=steam_limiter, resume_window_hours=0,
+                                         run_kind='scheduled', regions=regions)
+        rescheduled = reschedule(due, failed, settings)
+        print(f"🗓️  Rescheduled {rescheduled} games ({len(failed)} failed, retried in "
+              f"{settings['min_hours']:g}h)")
+
+    if len(due) < budget:
+        next_due = seconds_until_next_due()
+        delay = min(next_due, cycle_seconds) if next_due is not None else cycle_seconds
+    else:
+        # Still behind: start the next cycle once this one's budget is spent
+        delay = cycle_seconds - (time.monotonic() - started)
+    return max(delay, 1)
+
+
+def run_scheduler(regions=None, cycle_seconds=None, once=False):
+    """Poll due games in cycles until interrupted (or one cycle with ``once``)"""
+    settings = schedule_settings()
+    regions = regions or get_regions()
+    while True:
+        delay = run_cycle(regions, cycle_seconds, settings)
+        if once:
+            break
+        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll tracked games by priority, most overdue first")
+    parser.add_argument('--once', action='store_true', help="Run a single cycle and exit")
+    parser.add_argument('--cycle-seconds', type=float, default=None,
+                        help="Length of one polling cycle (default: POLL_CYCLE_SECONDS or 300)")
+    args = parser.parse_args()
+
+    try:
+        run_scheduler(cycle_seconds=args.cycle_seconds, once=args.once)
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduler stopped")
+        sys.exit(0)
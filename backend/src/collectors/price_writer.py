@@ -0,0 +1,320 @@
+"""
+Batched database writes for the collectors.
+
+PriceWriter holds a single connection for a whole collection run, buffers
+price observations and game metadata, and flushes them with multi-row
+statements. If a batch fails, it is retried row by row inside savepoints so
+one bad row only loses itself.
+"""
+import os
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# One statement records a batch of observations. In "intervals" mode an
+# observation whose prices match the game's current interval (found through
+# current_prices.history_id) only extends last_seen_at; anything else opens a
+# new price_history row. In "observations" mode every poll is a new row.
+# Intervals are never extended into a new month, so each one stays inside a
+# single monthly partition.
+# All rows of one flush share the transaction timestamp (LOCALTIMESTAMP).
+RECORD_PRICES_SQL = """
+    WITH v (app_id, currency, initial_price, final_price, discount_percent) AS (
+        VALUES %s
+    ),
+    extended AS (
+        UPDATE price_history ph
+        SET last_seen_at = LOCALTIMESTAMP,
+            observation_count = ph.observation_count + 1
+        FROM v
+        JOIN current_prices cp ON cp.app_id = v.app_id AND cp.currency = v.currency
+        WHERE {extend_intervals}
+            AND ph.id = cp.history_id
+            AND ph.checked_at = cp.history_checked_at
+            AND cp.history_checked_at >= date_trunc('month', LOCALTIMESTAMP)
+            AND ph.initial_price IS NOT DISTINCT FROM v.initial_price
+            AND ph.final_price IS NOT DISTINCT FROM v.final_price
+            AND ph.discount_percent IS NOT DISTINCT FROM v.discount_percent
+        RETURNING ph.id, ph.checked_at, ph.app_id, ph.currency
+    ),
+    inserted AS (
+        INSERT INTO price_history
+        (app_id, currency, initial_price, final_price, discount_percent, checked_at, last_seen_at)
+        SELECT v.*, LOCALTIMESTAMP, LOCALTIMESTAMP
+        FROM v
+        WHERE NOT EXISTS (
+            SELECT 1 FROM extended e WHERE e.app_id = v.app_id AND e.currency = v.currency
+        )
+        RETURNING id, checked_at, app_id, currency
+    )
+    INSERT INTO current_prices
+    (app_id, currency, initial_price, final_price, discount_percent, checked_at,
+     history_id, history_checked_at)
+    SELECT v.*, LOCALTIMESTAMP, h.id, h.checked_at
+    FROM v
+    JOIN (
+        SELECT * FROM extended
+        UNION ALL
+        SELECT * FROM inserted
+    ) h ON h.app_id = v.app_id AND h.currency = v.currency
+    ON CONFLICT (app_id, currency) DO UPDATE SET
+        initial_price = EXCLUDED.initial_price,
+        final_price = EXCLUDED.final_price,
+        discount_percent = EXCLUDED.discount_percent,
+        checked_at = EXCLUDED.checked_at,
+        history_id = EXCLUDED.history_id,
+        history_checked_at = EXCLUDED.history_checked_at
+    WHERE current_prices.checked_at <= EXCLUDED.checked_at
+"""
+
+PRICE_HISTORY_MODES = {
+    'intervals': RECORD_PRICES_SQL.format(extend_intervals='TRUE'),
+    'observations': RECORD_PRICES_SQL.format(extend_intervals='FALSE'),
+}
+
+# Casts keep all-NULL columns from being typed as text inside the VALUES list
+PRICE_ROW_TEMPLATE = "(%s::integer, %s::varchar, %s::integer, %s::integer, %s::integer)"
+
+# Incremental statistics update from per-game aggregates of the batch.
+# low_90d can only move down here; the nightly expire-price-stats job
+# recomputes it once that low ages out of the window.
+UPSERT_PRICE_STATS_SQL = """
+    INSERT INTO price_stats (
+        app_id, currency, low_90d, low_90d_at, all_time_low, all_time_high,
+        price_sum, observation_count, last_discount_at, updated_at
+    )
+    SELECT
+        v.app_id, v.currency, v.low, LOCALTIMESTAMP, v.low, v.high,
+        v.total, v.observations, CASE WHEN v.discounted THEN LOCALTIMESTAMP END, LOCALTIMESTAMP
+    FROM (VALUES %s) AS v(app_id, currency, low, high, total, observations, discounted)
+    ON CONFLICT (app_id, currency) DO UPDATE SET
+        low_90d = LEAST(price_stats.low_90d, EXCLUDED.low_90d),
+        low_90d_at = CASE
+            WHEN price_stats.low_90d IS NULL OR EXCLUDED.low_90d <= price_stats.low_90d
+            THEN EXCLUDED.low_90d_at
+            ELSE price_stats.low_90d_at
+        END,
+        all_time_low = LEAST(price_stats.all_time_low, EXCLUDED.all_time_low),
+        all_time_high = GREATEST(price_stats.all_time_high, EXCLUDED.all_time_high),
+        price_sum = price_stats.price_sum + EXCLUDED.price_sum,
+        observation_count = price_stats.observation_count + EXCLUDED.observation_count,
+        last_discount_at = COALESCE(EXCLUDED.last_discount_at, price_stats.last_discount_at),
+        updated_at = EXCLUDED.updated_at
+"""
+
+# Grade and 7-day forecast of the current price, computed once when prices
+# land instead of on every API request. The forecast compares against the
+# earliest interval seen in the last 7 days. {keys} selects the
+# (app_id, currency) rows to assess.
+ASSESS_PRICES_SQL = """
+    UPDATE current_prices cp
+    SET price_grade = price_grade(cp.final_price, ps.low_90d, ps.all_time_low),
+        forecast = price_forecast(ref.final_price, cp.final_price),
+        assessed_at = LOCALTIMESTAMP
+    FROM {keys}
+    LEFT JOIN price_stats ps ON ps.app_id = v.app_id AND ps.currency = v.currency
+    LEFT JOIN LATERAL (
+        SELECT h.final_price
+        FROM price_history h
+        WHERE h.app_id = v.app_id AND h.currency = v.currency
+            AND h.last_seen_at >= LOCALTIMESTAMP - INTERVAL '7 days'
+            AND h.checked_at >= date_trunc('month', LOCALTIMESTAMP - INTERVAL '7 days')
+        ORDER BY h.checked_at
+        LIMIT 1
+    ) ref ON TRUE
+    WHERE cp.app_id = v.app_id AND cp.currency = v.currency
+"""
+
+ASSESS_BATCH_SQL = ASSESS_PRICES_SQL.format(keys="(VALUES %s) AS v(app_id, currency)")
+ASSESS_ALL_SQL = ASSESS_PRICES_SQL.format(keys="(SELECT app_id, currency FROM current_prices) AS v")
+
+# The WHERE clause turns the update into a no-op (no new row version, no
+# last_updated bump) when the appdetails metadata has not changed.
+UPSERT_GAME_DETAILS_SQL = """
+    INSERT INTO games (
+        app_id, name, short_description, header_image_url,
+        release_date, metacritic_score, recommendation_count,
+        platform_windows, platform_mac, platform_linux,
+        genres, publishers, developers, metadata_hash,
+        added_at, last_updated
+    ) VALUES %s
+    ON CONFLICT (app_id) DO UPDATE SET
+        name = EXCLUDED.name,
+        short_description = EXCLUDED.short_description,
+        header_image_url = EXCLUDED.header_image_url,
+        release_date = EXCLUDED.release_date,
+        metacritic_score = EXCLUDED.metacritic_score,
+        recommendation_count = EXCLUDED.recommendation_count,
+        platform_windows = EXCLUDED.platform_windows,
+        platform_mac = EXCLUDED.platform_mac,
+        platform_linux = EXCLUDED.platform_linux,
+        genres = EXCLUDED.genres,
+        publishers = EXCLUDED.publishers,
+        developers = EXCLUDED.developers,
+        metadata_hash = EXCLUDED.metadata_hash,
+        last_updated = CURRENT_TIMESTAMP
+    WHERE games.metadata_hash IS DISTINCT FROM EXCLUDED.metadata_hash
+"""
+
+GAME_DETAILS_TEMPLATE = (
+    "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+)
+
+
+def latest_per_key(rows, key):
+    """Keep only the last row for each key, preserving first-seen order"""
+    latest = {}
+    for row in rows:
+        latest[key(row)] = row
+    return list(latest.values())
+
+
+class PriceWriter:
+    """
+    Buffers collector writes and flushes them in batches over one connection.
+
+    Use as a context manager so the final partial batch is flushed:
+
+        with PriceWriter(get_db_connection()) as writer:
+            writer.add_price(app_id, price_overview)
+
+    Args:
+        conn: Open psycopg2 connection, owned by the writer from here on.
+        flush_size (int): Buffered rows that trigger a flush (DB_FLUSH_SIZE).
+        history_mode (str): "intervals" (change-only history) or
+            "observations" (one row per poll); PRICE_HISTORY_MODE.
+    """
+
+    def __init__(self, conn, flush_size=None, history_mode=None):
+        self.conn = conn
+        self.flush_size = flush_size or int(os.getenv("DB_FLUSH_SIZE", "200"))
+        history_mode = history_mode or os.getenv("PRICE_HISTORY_MODE", "intervals")
+        if history_mode not in PRICE_HISTORY_MODES:
+            raise ValueError(f"Unknown price history mode: {history_mode!r}")
+        self._record_prices_sql = PRICE_HISTORY_MODES[history_mode]
+        self._prices = []
+        self._details = []
+        self.stats = {
+            'prices_written': 0,
+            'details_updated': 0,
+            'details_unchanged': 0,
+            'failed_rows': 0,
+            'flushes': 0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add_price(self, app_id, price_data):
+        """Queue one price_overview observation"""
+        if not price_data or price_data.get('currency') is None:
+            return
+        self._prices.append((
+            app_id,
+            price_data.get('currency'),
+            price_data.get('initial'),
+            price_data.get('final'),
+            price_data.get('discount_percent', 0)
+        ))
+        self._maybe_flush()
+
+    def add_game_details(self, details):
+        """Queue a games row as produced by extract_game_details()"""
+        self._details.append(details)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._prices) + len(self._details) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered; games first so price rows satisfy their FK"""
+        details, self._details = self._details, []
+        prices, self._prices = self._prices, []
+        if details:
+            self._flush_rows(details, self._write_details)
+        if prices:
+            self._flush_rows(prices, self._write_prices)
+
+    def close(self):
+        """Flush the remaining rows and close the connection"""
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def _flush_rows(self, rows, write):
+        self.stats['flushes'] += 1
+        try:
+            with self.conn.cursor() as cur:
+                write(cur, rows)
+            self.conn.commit()
+        except psycopg2.Error as e:
+            self.conn.rollback()
+            print(f"⚠️  Batch of {len(rows)} rows failed ({e}); retrying rows individually")
+            self._write_individually(rows, write)
+
+    def _write_individually(self, rows, write):
+        """Retry each row in its own savepoint so one bad row cannot sink the rest"""
+        with self.conn.cursor() as cur:
+            for row in rows:
+                cur.execute("SAVEPOINT writer_row")
+                try:
+                    write(cur, [row])
+                    cur.execute("RELEASE SAVEPOINT writer_row")
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT writer_row")
+                    self.stats['failed_rows'] += 1
+                    print(f"❌ Database error saving App ID {row[0]}: {e}")
+        self.conn.commit()
+
+    def _write_prices(self, cur, rows):
+        # A game can appear twice in one batch; ON CONFLICT may only touch
+        # each target row once per statement, so history keeps the latest
+        # observation while the statistics below still count both
+        current = latest_per_key(rows, key=lambda row: (row[0], row[1]))
+        execute_values(cur, self._record_prices_sql, current,
+                       template=PRICE_ROW_TEMPLATE, page_size=len(current))
+
+        aggregates = {}
+        for app_id, currency, _, final_price, discount in rows:
+            if final_price is None:
+                continue
+            key = (app_id, currency)
+            low, high, total, count, discounted = aggregates.get(key, (final_price, final_price, 0, 0, False))
+            aggregates[key] = (
+                min(low, final_price),
+                max(high, final_price),
+                total + final_price,
+                count + 1,
+                discounted or (discount or 0) > 0
+            )
+        if aggregates:
+            stats_rows = [key + values for key, values in aggregates.items()]
+            execute_values(cur, UPSERT_PRICE_STATS_SQL, stats_rows, page_size=len(stats_rows))
+
+        # Grades depend on the statistics just written
+        keys = [(app_id, currency) for app_id, currency, *_ in current]
+        execute_values(cur, ASSESS_BATCH_SQL, keys, template="(%s::integer, %s::varchar)", page_size=len(keys))
+
+        self.stats['prices_written'] += len(rows)
+
+    def _write_details(self, cur, rows):
+        rows = latest_per_key(rows, key=lambda row: row[0])
+        execute_values(cur, UPSERT_GAME_DETAILS_SQL, rows,
+                       template=GAME_DETAILS_TEMPLATE, page_size=len(rows))
+        updated = cur.rowcount
+
+        # Record the check on the narrow tracking table so the refresh
+        # schedule advances even when games itself is left alone
+        cur.execute("""
+            UPDATE games_to_track SET metadata_checked_at = CURRENT_TIMESTAMP
+            WHERE app_id = ANY(%s)
+        """, ([row[0] for row in rows],))
+
+        self.stats['details_updated'] += updated
+        self.stats['details_unchanged'] += len(rows) - updated
@@ -0,0 +1,243 @@
+"""
+Rate limiting shared by every worker that talks to the Steam store.
+
+A single TokenBucket enforces the global request rate across threads, and a
+429 from any worker pauses the whole bucket instead of just that worker.
+AdaptiveRateLimiter adds AIMD rate control on top and remembers the rate it
+learned between runs; get_shared_limiter() hands the same instance to the
+price collector and the game list manager.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with a shared backoff pause.
+
+    Args:
+        rate (float): Tokens added per second (the sustained request rate).
+        capacity (float): Maximum burst size.
+        base_backoff (float): First pause after a 429, in seconds.
+        max_backoff (float): Upper bound on a single pause.
+    """
+
+    def __init__(self, rate, capacity=1.0, base_backoff=5.0, max_backoff=80.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a limiter from STEAM_REQUESTS_PER_SECOND / STEAM_BURST"""
+        return cls(
+            rate=float(os.getenv("STEAM_REQUESTS_PER_SECOND", "0.6")),
+            capacity=float(os.getenv("STEAM_BURST", "1"))
+        )
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def report_success(self):
+        """Record a healthy response, resetting the backoff sequence"""
+        with self._lock:
+            self._consecutive_throttles = 0
+
+    def report_throttled(self, retry_after=None):
+        """
+        Record a 429 and pause every worker.
+
+        Throttles reported while a pause is already running extend it but do
+        not escalate the backoff, so N workers hitting the same 429 wave
+        count as one event.
+
+        Args:
+            retry_after (float): Server-provided wait in seconds, if any.
+
+        Returns:
+            float: Seconds until requests resume.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._paused_until:
+                self._consecutive_throttles += 1
+            attempt = max(self._consecutive_throttles - 1, 0)
+            wait = min(self.base_backoff * (2 ** attempt), self.max_backoff)
+            if retry_after is not None:
+                wait = max(wait, retry_after)
+            self._paused_until = max(self._paused_until, now + wait)
+            self._tokens = 0
+            return self._paused_until - now
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows AIMD (additive increase, multiplicative decrease).
+
+    The rate grows by ``increase_step`` after every ``increase_every`` healthy
+    responses and is multiplied by ``decrease_factor`` on a 429 or 5xx, staying
+    within [min_rate, max_rate]. With a ``state_file`` the learned rate is
+    loaded on start and written back by save_state().
+
+    Args:
+        rate (float): Starting rate when no saved state exists.
+        min_rate (float): Floor for the request rate.
+        max_rate (float): Ceiling for the request rate.
+        increase_step (float): Requests/second added per increase.
+        increase_every (int): Healthy responses required before each increase.
+        decrease_factor (float): Multiplier applied on overload.
+        state_file (str): JSON file used to persist the rate between runs.
+    """
+
+    def __init__(self, rate, min_rate, max_rate, capacity=1.0, increase_step=0.05,
+                 increase_every=20, decrease_factor=0.5, state_file=None, **kwargs):
+        super().__init__(rate, capacity, **kwargs)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.increase_every = increase_every
+        self.decrease_factor = decrease_factor
+        self.state_file = state_file
+
+        self._healthy_streak = 0
+        self._last_decrease = 0.0
+
+        if state_file:
+            self._load_state()
+        self.rate = self._clamp(self.rate)
+
+    @classmethod
+    def from_env(cls):
+        """Build a limiter from the STEAM_* rate settings"""
+        default_state = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.steam_rate_state.json')
+        return cls(
+            rate=float(os.getenv("STEAM_REQUESTS_PER_SECOND", "0.6")),
+            min_rate=float(os.getenv("STEAM_MIN_REQUESTS_PER_SECOND", "0.2")),
+            max_rate=float(os.getenv("STEAM_MAX_REQUESTS_PER_SECOND", "3")),
+            capacity=float(os.getenv("STEAM_BURST", "1")),
+            state_file=os.getenv("STEAM_RATE_STATE_FILE", default_state)
+        )
+
+    def _clamp(self, rate):
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            self.rate = float(state['rate'])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save_state(self):
+        """Persist the current rate so the next run starts from it"""
+        if not self.state_file:
+            return
+        state = {'rate': self.rate, 'saved_at': datetime.now(timezone.utc).isoformat()}
+        tmp_path = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            print(f"⚠️  Could not save rate limiter state: {e}")
+
+    def _decrease(self, now):
+        """Cut the rate once per overload wave; caller holds the lock"""
+        if now - self._last_decrease < max(1.0 / self.rate, 2.0):
+            return
+        self._last_decrease = now
+        self._healthy_streak = 0
+        self.rate = self._clamp(self.rate * self.decrease_factor)
+
+    def report_success(self):
+        """Record a healthy response and ramp the rate up additively"""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self._healthy_streak += 1
+            if self._healthy_streak >= self.increase_every:
+                self._healthy_streak = 0
+                self.rate = self._clamp(self.rate + self.increase_step)
+
+    def report_throttled(self, retry_after=None):
+        """Record a 429: cut the rate and pause every worker"""
+        with self._lock:
+            self._decrease(time.monotonic())
+        return super().report_throttled(retry_after)
+
+    def report_server_error(self, retry_after=None):
+        """
+        Record a 5xx: cut the rate, pausing only if the server asked for it.
+
+        Returns:
+            float: Seconds until requests resume.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._decrease(now)
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            return max(self._paused_until - now, 0.0)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter():
+    """Process-wide adaptive limiter for all Steam store traffic"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter.from_env()
+        return _shared_limiter
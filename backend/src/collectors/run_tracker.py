@@ -0,0 +1,160 @@
+"""
+Checkpointed collection runs.
+
+A CollectionRun records which games a run has finished in
+collection_run_items. If the collector is killed, the next run of the same
+kind and currency within the resume window picks up the same run and skips
+everything already done; games that failed are tried again.
+"""
+import os
+
+from psycopg2.extras import execute_values
+
+
+class CollectionRun:
+    """
+    Progress of one collector run, checkpointed to the database.
+
+    Use CollectionRun.start() as a context manager around the collection
+    loop; leaving the block normally completes the run, an exception marks
+    it interrupted so the next start() resumes it.
+
+    Args:
+        conn: Open psycopg2 connection, owned by the run from here on.
+        run_id (int): collection_runs.id.
+        completed (set): App IDs already done in this run.
+        checkpoint_every (int): Results buffered before each checkpoint.
+        before_checkpoint (callable): Called before progress is recorded,
+            e.g. PriceWriter.flush, so a game is only marked done once its
+            rows are committed.
+    """
+
+    def __init__(self, conn, run_id, completed=(), checkpoint_every=100, before_checkpoint=None):
+        self.conn = conn
+        self.run_id = run_id
+        self.completed = set(completed)
+        self.checkpoint_every = checkpoint_every
+        self.before_checkpoint = before_checkpoint
+        self._results = []
+
+    @classmethod
+    def start(cls, conn, kind, currency, app_ids, resume_window_hours=None,
+              checkpoint_every=None, before_checkpoint=None):
+        """
+        Resume the latest unfinished run of this kind, or open a new one.
+
+        Args:
+            conn: Open psycopg2 connection.
+            kind (str): Run type, e.g. "full" or "prices".
+            currency (str): Country code the run collects for.
+            app_ids (list): Games the run should cover.
+            resume_window_hours (float): Unfinished runs started longer ago
+                than this are abandoned instead (COLLECTION_RESUME_WINDOW_HOURS).
+        """
+        if resume_window_hours is None:
+            resume_window_hours = float(os.getenv("COLLECTION_RESUME_WINDOW_HOURS", "6"))
+        checkpoint_every = checkpoint_every or int(os.getenv("COLLECTION_CHECKPOINT_EVERY", "100"))
+
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT id FROM collection_runs
+                WHERE kind = %s AND currency = %s
+                    AND status IN ('running', 'interrupted')
+                    AND started_at >= NOW() - make_interval(secs => %s)
+                ORDER BY started_at DESC
+                LIMIT 1
+            """, (kind, currency, resume_window_hours * 3600))
+            row = cur.fetchone()
+
+            if row:
+                run_id = row[0]
+                cur.execute("""
+                    UPDATE collection_runs
+                    SET status = 'running', resumes = resumes + 1, total_items = %s
+                    WHERE id = %s
+                """, (len(app_ids), run_id))
+                cur.execute("""
+                    SELECT app_id FROM collection_run_items
+                    WHERE run_id = %s AND status = 'done'
+                """, (run_id,))
+                completed = [r[0] for r in cur.fetchall()]
+            else:
+                # Anything older that never finished is not coming back
+                cur.execute("""
+                    UPDATE collection_runs SET status = 'abandoned'
+                    WHERE kind = %s AND currency = %s AND status IN ('running', 'interrupted')
+                """, (kind, currency))
+                cur.execute("""
+                    INSERT INTO collection_runs (kind, currency, total_items)
+                    VALUES (%s, %s, %s)
+                    RETURNING id
+                """, (kind, currency, len(app_ids)))
+                run_id = cur.fetchone()[0]
+                completed = []
+        conn.commit()
+
+        run = cls(conn, run_id, completed, checkpoint_every, before_checkpoint)
+        if completed:
+            print(f"↩️  Resuming run {run_id}: {len(run.completed)} games already collected")
+        return run
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.finish('interrupted' if exc_type else 'completed')
+        except Exception as e:
+            print(f"⚠️  Could not record run {self.run_id} status: {e}")
+        finally:
+            self.conn.close()
+        return False
+
+    def pending(self, app_ids):
+        """The given IDs minus those already collected in this run"""
+        return [app_id for app_id in app_ids if app_id not in self.completed]
+
+    def mark(self, app_id, succeeded):
+        """Record one game's outcome; checkpoints every ``checkpoint_every`` results"""
+        self._results.append((self.run_id, app_id, 'done' if succeeded else 'failed'))
+        if succeeded:
+            self.completed.add(app_id)
+        if len(self._results) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Persist buffered results and counters"""
+        if self.before_checkpoint:
+            self.before_checkpoint()
+        results, self._results = self._results, []
+        succeeded = sum(1 for _, _, status in results if status == 'done')
+
+        with self.conn.cursor() as cur:
+            if results:
+                execute_values(cur, """
+                    INSERT INTO collection_run_items (run_id, app_id, status)
+                    VALUES %s
+                    ON CONFLICT (run_id, app_id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        finished_at = CURRENT_TIMESTAMP
+                """, results)
+            cur.execute("""
+                UPDATE collection_runs
+                SET succeeded = succeeded + %s,
+                    failed = failed + %s,
+                    last_checkpoint_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (succeeded, len(results) - succeeded, self.run_id))
+        self.conn.commit()
+
+    def finish(self, status='completed'):
+        """Checkpoint what is left and close the run with ``status``"""
+        self.checkpoint()
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE collection_runs
+                SET status = %s,
+                    finished_at = CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP END
+                WHERE id = %s
+            """, (status, status, self.run_id))
+        self.conn.commit()
@@ -0,0 +1,242 @@
+"""
+HTTP layer shared by every collector that talks to the Steam store.
+
+SteamClient keeps one pooled keep-alive session (gzip, per-endpoint
+timeouts) behind the shared adaptive rate limiter, and can cache
+appdetails documents on disk so a game probed by game_list_manager is not
+downloaded again by the price collector within the cache TTL.
+get_shared_client() hands the same instance to every module in a process.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_shared_limiter, parse_retry_after
+
+# (connect, read) timeouts in seconds by path prefix
+ENDPOINT_TIMEOUTS = {
+    '/api/appdetails': (3.05, 10),
+    '/search/results': (3.05, 15),
+    '/search': (3.05, 20),
+}
+DEFAULT_TIMEOUT = (3.05, 15)
+
+
+class ResponseDiskCache:
+    """
+    JSON response bodies stored as one file per URL, valid for ``ttl`` seconds.
+
+    Safe to share between processes: files are written to a temporary name
+    and renamed into place.
+
+    Args:
+        directory (str): Cache directory, created on first write.
+        ttl (float): Seconds a cached body is served.
+    """
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def get(self, key):
+        """Return the cached body, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self.misses += 1
+                return None
+            with open(path) as f:
+                body = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return body
+
+    def set(self, key, body):
+        """Store a body; failures only cost a future cache miss"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(body, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Could not write Steam response cache: {e}")
+
+
+class SteamClient:
+    """
+    Rate-limited, pooled HTTP client for the Steam store.
+
+    requests.Session is shared by all worker threads; the urllib3 pool under
+    the adapter is thread-safe and keeps up to ``pool_size`` connections alive.
+
+    Args:
+        base_url (str): Store root, overridable for the offline stub server.
+        limiter (AdaptiveRateLimiter): Shared request budget.
+        cache (ResponseDiskCache): Optional appdetails cache.
+        pool_size (int): Keep-alive connections held open.
+    """
+
+    def __init__(self, base_url, limiter, cache=None, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.limiter = limiter
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'deal-forge-collector/1.0',
+        })
+
+    @classmethod
+    def from_env(cls, limiter=None):
+        """Build a client from STEAM_STORE_BASE_URL / STEAM_CACHE_* / STEAM_WORKERS"""
+        cache_dir = os.getenv("STEAM_CACHE_DIR")
+        cache = ResponseDiskCache(cache_dir, float(os.getenv("STEAM_CACHE_TTL", "900"))) if cache_dir else None
+        return cls(
+            base_url=os.getenv("STEAM_STORE_BASE_URL", "https://store.steampowered.com"),
+            limiter=limiter or get_shared_limiter(),
+            cache=cache,
+            pool_size=max(int(os.getenv("STEAM_WORKERS", "4")), 1) * 2
+        )
+
+    @staticmethod
+    def timeout_for(path):
+        """Timeout of the most specific ENDPOINT_TIMEOUTS prefix matching ``path``"""
+        matches = [prefix for prefix in ENDPOINT_TIMEOUTS if path.startswith(prefix)]
+        return ENDPOINT_TIMEOUTS[max(matches, key=len)] if matches else DEFAULT_TIMEOUT
+
+    def url(self, path, params=None):
+        """Absolute URL for a store path; parameters are sorted so equal requests share a cache key"""
+        query = urlencode(sorted(params.items()), safe=',') if params else ''
+        return f"{self.base_url}{path}{'?' + query if query else ''}"
+
+    def get(self, path, params=None, label=None, max_retries=5, limiter=None):
+        """
+        GET a store URL through the rate limiter.
+
+        A 429 or 5xx cuts the global rate (and honours Retry-After) before the
+        request is retried.
+
+        Returns:
+            requests.Response: The successful response, or None if every
+            attempt failed.
+        """
+        limiter = limiter or self.limiter
+        url = self.url(path, params)
+        label = label or path
+        timeout = self.timeout_for(path)
+
+        for attempt in range(max_retries):
+            limiter.acquire()
+            try:
+                response = self.session.get(url, timeout=timeout)
+
+                # If rate limited, slow the whole pool down and retry
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code == 429:
+                    wait_time = limiter.report_throttled(retry_after)
+                    print(f"⚠️  Rate limited! Pausing all workers {wait_time:.0f}s "
+                          f"(now {limiter.rate:.2f} req/s) before retry {attempt + 1}/{max_retries}...")
+                    continue
+                if response.status_code >= 500:
+                    limiter.report_server_error(retry_after)
+                    print(f"⚠️  Steam returned {response.status_code} for {label} "
+                          f"(now {limiter.rate:.2f} req/s), retry {attempt + 1}/{max_retries}...")
+                    continue
+
+                response.raise_for_status()
+                limiter.report_success()
+                return response
+
+            except requests.exceptions.Timeout:
+                print(f"⚠️  Timeout fetching data for {label}")
+                if attempt < max_retries - 1:
+                    continue
+                return None
+            except requests.exceptions.RequestException as e:
+                print(f"❌ An error occurred during the request: {e}")
+                return None
+
+        print(f"❌ Max retries exceeded for {label}")
+        return None
+
+    def get_json(self, path, params=None, label=None, max_retries=5, limiter=None, use_cache=False):
+        """
+        GET a store API URL and decode its JSON body.
+
+        Args:
+            use_cache (bool): Serve from / store into the disk cache, if configured.
+
+        Returns:
+            The decoded JSON body, or None if the request failed.
+        """
+        cache_key = self.url(path, params)
+        if use_cache and self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response = self.get(path, params, label, max_retries, limiter)
+        if response is None:
+            return None
+        try:
+            data = response.json()
+        except ValueError as e:
+            print(f"❌ Could not parse data from the response: {e}")
+            return None
+
+        if use_cache and self.cache:
+            self.cache.set(cache_key, data)
+        return data
+
+    def get_app_details(self, app_id, currency_code='us', max_retries=5, limiter=None):
+        """
+        Full appdetails document for one game, shared through the disk cache.
+
+        Every caller asks with the same parameters, so a document fetched by
+        one collector is reused by the others within the cache TTL.
+
+        Returns:
+            dict: The game's data, or None if Steam has none or the request failed.
+        """
+        data = self.get_json('/api/appdetails', {'appids': app_id, 'cc': currency_code},
+                             f"App ID {app_id}", max_retries, limiter, use_cache=True)
+        try:
+            if data and data[str(app_id)]['success']:
+                return data[str(app_id)]['data']
+            print(f"⚠️  No data available for App ID {app_id}")
+            return None
+        except (KeyError, TypeError) as e:
+            print(f"❌ Could not parse data from the response: {e}")
+            return None
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client():
+    """Process-wide Steam client using the shared rate limiter"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = SteamClient.from_env()
+        return _shared_client
@@ -1,274 +1,525 @@
-import requests
+import argparse
 import json
-import psycopg2
+import hashlib
 from datetime import datetime
 import os
 import sys
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from db_pool import get_db_connection
+from price_writer import PriceWriter
+from rate_limiter import get_shared_limiter
+from run_tracker import CollectionRun
+from steam_client import get_shared_client
 
 # Load environment variables
 load_dotenv()
 
-def get_db_connection():
-    """Establish database connection"""
+# Adaptive Steam request budget shared by every collection worker and by
+# game_list_manager when both run in one process
+steam_limiter = get_shared_limiter()
+
+# Pooled keep-alive session (and optional appdetails disk cache) on top of it
+steam_client = get_shared_client()
+
+@contextmanager
+def worker_pool(workers):
+    """
+    ThreadPoolExecutor that drops its queued requests if the block raises.
+    
+    Leaving a plain ``with ThreadPoolExecutor()`` block waits for every
+    submitted request, so Ctrl-C would keep fetching the whole backlog before
+    the run is marked interrupted; here only the requests in flight finish.
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            database=os.getenv("DB_NAME", "steam_prices"),
-            user=os.getenv("DB_USER", "steam_user"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432")
-        )
-        return conn
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        sys.exit(1)
+        yield executor
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
 
-def get_steam_game_price(app_id, currency_code='us', max_retries=5):
+def get_steam_game_price(app_id, currency_code='us', max_retries=5, limiter=None):
     """
     Fetches the price and name of a Steam game in a specific currency.
-    Implements exponential backoff for rate limiting.
     
     Args:
         app_id (int or str): The Steam App ID of the game.
         currency_code (str): The two-letter country code for the currency (e.g., 'us' for USD).
         max_retries (int): Maximum number of retry attempts for rate limiting.
+        limiter (AdaptiveRateLimiter): Shared limiter; defaults to the module-wide one.
         
     Returns:
         dict: A dictionary containing the game's data, or None if the request fails.
     """
-    url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&cc={currency_code}"
+    return steam_client.get_app_details(app_id, currency_code, max_retries, limiter)
+
+def get_steam_prices_batch(app_ids, currency_code='us', max_retries=5, limiter=None):
+    """
+    Fetches only the price_overview block for several games in one request.
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=10)
-            
-            # If rate limited, wait and retry with exponential backoff
-            if response.status_code == 429:
-                wait_time = (2 ** attempt) * 5  # 5, 10, 20, 40, 80 seconds
-                print(f"⚠️  Rate limited! Waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
-                time.sleep(wait_time)
-                continue
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Check if the request was successful and contains data
-            if data and data[str(app_id)]['success']:
-                return data[str(app_id)]['data']
-            else:
-                print(f"⚠️  No data available for App ID {app_id}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            print(f"⚠️  Timeout fetching data for App ID {app_id}")
-            if attempt < max_retries - 1:
-                time.sleep(5)
-                continue
-            return None
-        except requests.exceptions.RequestException as e:
-            if "429" in str(e):
-                wait_time = (2 ** attempt) * 5
-                print(f"⚠️  Rate limited! Waiting {wait_time}s before retry {attempt + 1}/{max_retries}...")
-                time.sleep(wait_time)
-                continue
-            print(f"❌ An error occurred during the request: {e}")
-            return None
-        except (KeyError, json.JSONDecodeError) as e:
-            print(f"❌ Could not parse data from the response: {e}")
-            return None
-    
-    print(f"❌ Max retries exceeded for App ID {app_id}")
-    return None
+    The appdetails endpoint accepts a comma-separated appids list as long as
+    filters=price_overview is set, which returns a few hundred bytes per
+    game instead of the full store document.
+    
+    Args:
+        app_ids (list): Steam App IDs to price.
+        currency_code (str): The two-letter country code for the currency.
+        max_retries (int): Maximum number of retry attempts for rate limiting.
+        limiter (AdaptiveRateLimiter): Shared limiter; defaults to the module-wide one.
+        
+    Returns:
+        dict: App ID -> price_overview dict, or None for games Steam reports
+        without a price (free to play). IDs that failed are left out.
+    """
+    params = {
+        'appids': ",".join(str(app_id) for app_id in app_ids),
+        'cc': currency_code,
+        'filters': 'price_overview',
+    }
+    data = steam_client.get_json('/api/appdetails', params, f"{len(app_ids)} App IDs", max_retries, limiter)
+    if not isinstance(data, dict):
+        return {}
+    
+    prices = {}
+    for app_id in app_ids:
+        entry = data.get(str(app_id))
+        if not isinstance(entry, dict) or not entry.get('success'):
+            continue
+        # Games without a price come back as an empty list instead of a dict
+        details = entry.get('data')
+        prices[app_id] = details.get('price_overview') if isinstance(details, dict) else None
+    return prices
 
 def save_price_to_db(app_id, game_data, currency):
     """Save price data and game details to the database"""
-    # First, save comprehensive game details
-    save_game_details_to_db(app_id, game_data)
+    with PriceWriter(get_db_connection()) as writer:
+        writer.add_game_details(extract_game_details(app_id, game_data))
+        writer.add_price(app_id, game_data.get('price_overview'))
+
+def save_price_observation(app_id, price_data):
+    """Record one price_overview observation in history, snapshot and stats"""
+    with PriceWriter(get_db_connection()) as writer:
+        writer.add_price(app_id, price_data)
+
+def extract_game_details(app_id, game_data):
+    """
+    Pull the columns stored in the games table out of an appdetails document.
     
-    # Then save price history
+    Returns:
+        tuple: Values in games column order (see PriceWriter), ending with a
+        content hash of everything else so unchanged metadata can be skipped.
+    """
+    # Parse release date
+    release_date_str = game_data.get('release_date', {}).get('date')
+    release_date = None
+    if release_date_str and not game_data.get('release_date', {}).get('coming_soon', False):
+        try:
+            # Try common date formats
+            for fmt in ['%b %d, %Y', '%d %b, %Y', '%Y']:
+                try:
+                    release_date = datetime.strptime(release_date_str, fmt).date()
+                    break
+                except:
+                    continue
+        except:
+            pass
+    
+    # Extract data with safe defaults
+    name = game_data.get('name', 'Unknown')
+    short_desc = game_data.get('short_description', '')
+    header_image = game_data.get('header_image', '')
+    
+    metacritic = game_data.get('metacritic', {}).get('score')
+    recommendations = game_data.get('recommendations', {}).get('total', 0)
+    
+    # Platforms
+    platforms = game_data.get('platforms', {})
+    platform_windows = platforms.get('windows', False)
+    platform_mac = platforms.get('mac', False)
+    platform_linux = platforms.get('linux', False)
+    
+    # JSON fields - convert to JSON strings
+    genres = json.dumps(game_data.get('genres', []), sort_keys=True)
+    publishers = json.dumps(game_data.get('publishers', []), sort_keys=True)
+    developers = json.dumps(game_data.get('developers', []), sort_keys=True)
+    
+    values = (
+        app_id, name, short_desc, header_image,
+        release_date, metacritic, recommendations,
+        platform_windows, platform_mac, platform_linux,
+        genres, publishers, developers
+    )
+    metadata_hash = hashlib.sha256(repr(values).encode()).hexdigest()
+    return values + (metadata_hash,)
+
+def save_game_details_to_db(app_id, game_data):
+    """
+    Save comprehensive game details to database.
+    
+    Returns:
+        bool: True if the games row was written, False if the metadata was
+        unchanged (or the save failed).
+    """
+    with PriceWriter(get_db_connection()) as writer:
+        writer.add_game_details(extract_game_details(app_id, game_data))
+    return writer.stats['details_updated'] > 0
+
+def bump_data_version(name='prices'):
+    """Tell API workers that data changed so they drop cached responses"""
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        price_data = game_data.get('price_overview')
-        
-        # Insert price history if game has pricing
-        if price_data:
-            cur.execute("""
-                INSERT INTO price_history 
-                (app_id, currency, initial_price, final_price, discount_percent)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                app_id,
-                price_data.get('currency'),
-                price_data.get('initial'),
-                price_data.get('final'),
-                price_data.get('discount_percent', 0)
-            ))
-            
-            conn.commit()
-        
+        cur.execute("""
+            INSERT INTO data_versions (name, version, updated_at)
+            VALUES (%s, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET
+                version = data_versions.version + 1,
+                updated_at = CURRENT_TIMESTAMP
+        """, (name,))
+        conn.commit()
     except Exception as e:
-        print(f"❌ Database error saving price for App ID {app_id}: {e}")
+        print(f"⚠️  Could not bump data version: {e}")
         conn.rollback()
     finally:
         cur.close()
         conn.close()
 
-def save_game_details_to_db(app_id, game_data):
-    """Save comprehensive game details to database"""
+def collect_prices(app_ids, currency='us', workers=None, limiter=None, resume_window_hours=None):
+    """
+    Collect prices for multiple games with progress tracking.
+    
+    Up to ``workers`` requests are in flight at once while the shared token
+    bucket enforces the global Steam request rate. Results are written to
+    the database from this thread as they complete, batched over one
+    connection by PriceWriter.
+    
+    Progress is checkpointed to collection_runs; a run that was killed is
+    resumed, skipping games it already collected.
+    """
+    workers = workers or int(os.getenv("STEAM_WORKERS", "4"))
+    limiter = limiter or steam_limiter
+    
+    successful = 0
+    failed = 0
+    start_time = datetime.now()
+    
+    with PriceWriter(get_db_connection()) as writer, \
+            CollectionRun.start(get_db_connection(), 'full', currency, app_ids, resume_window_hours,
+                                before_checkpoint=writer.flush) as run, \
+            worker_pool(workers) as executor:
+        app_ids = run.pending(app_ids)
+        total_games = len(app_ids)
+        print(f"\n🎮 Starting price collection for {total_games} games ({workers} workers, {limiter.rate:g} req/s)...")
+        print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Run {run.run_id}")
+        print(f"{'='*70}\n")
+        
+        futures = {
+            executor.submit(get_steam_game_price, app_id, currency, limiter=limiter): app_id
+            for app_id in app_ids
+        }
+        
+        for idx, future in enumerate(as_completed(futures), 1):
+            app_id = futures[future]
+            try:
+                game_data = future.result()
+            except Exception as e:
+                print(f"❌ Unexpected error fetching App ID {app_id}: {e}")
+                game_data = None
+            
+            if game_data:
+                game_name = game_data.get('name', 'Unknown')
+                
+                # Queue both game details and price
+                writer.add_game_details(extract_game_details(app_id, game_data))
+                writer.add_price(app_id, game_data.get('price_overview'))
+                run.mark(app_id, True)
+                successful += 1
+                
+                # Print success info
+                price_data = game_data.get('price_overview')
+                if price_data:
+                    final_price = price_data.get('final', 0) / 100
+                    discount = price_data.get('discount_percent', 0)
+                    print(f"[{idx}/{total_games}] ✓ {game_name} - ${final_price:.2f} ({discount}% off)")
+                else:
+                    print(f"[{idx}/{total_games}] ✓ {game_name} (Free to play)")
+            else:
+                run.mark(app_id, False)
+                failed += 1
+                print(f"[{idx}/{total_games}] ✗ App ID {app_id} failed")
+            
+            # Progress summary every 50 games
+            if idx % 50 == 0:
+                elapsed = (datetime.now() - start_time).total_seconds()
+                avg_time = elapsed / idx
+                remaining = (total_games - idx) * avg_time
+                
+                print(f"\n{'─'*70}")
+                print(f"📊 Progress: {idx}/{total_games} ({idx/total_games*100:.1f}%)")
+                print(f"✅ Successful: {successful} | ❌ Failed: {failed}")
+                print(f"⏱️  Avg time per game: {avg_time:.1f}s | Est. remaining: {remaining/60:.1f} min")
+                print(f"{'─'*70}\n")
+    
+    limiter.save_state()
+    if successful:
+        bump_data_version()
+    
+    # Final summary
+    elapsed_total = (datetime.now() - start_time).total_seconds()
+    print(f"\n{'='*70}")
+    print(f"✅ COLLECTION COMPLETE")
+    print(f"{'='*70}")
+    print(f"Total games processed: {total_games}")
+    print(f"Successful: {successful} ({successful/max(total_games, 1)*100:.1f}%)")
+    print(f"Failed: {failed} ({failed/max(total_games, 1)*100:.1f}%)")
+    print(f"Total time: {elapsed_total/60:.1f} minutes")
+    print(f"Average: {elapsed_total/max(total_games, 1):.1f} seconds per game")
+    print(f"Database: {writer.stats['flushes']} flushes, {writer.stats['failed_rows']} rows failed")
+    print(f"Learned request rate: {limiter.rate:.2f} req/s")
+    print(f"{'='*70}\n")
+
+def get_regions():
+    """
+    Store regions (country codes) to collect prices for.
+    
+    STEAM_REGIONS lists them comma-separated; without it the single CURRENCY
+    country code is used, as before.
+    """
+    configured = os.getenv("STEAM_REGIONS") or os.getenv("CURRENCY", "us")
+    regions = []
+    for cc in configured.split(','):
+        cc = cc.strip().lower()
+        if cc and cc not in regions:
+            regions.append(cc)
+    return regions or ['us']
+
+def save_region_currencies(region_currencies):
+    """Remember which currency each region is priced in, for the API's region parameter"""
+    if not region_currencies:
+        return
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        # Parse release date
-        release_date_str = game_data.get('release_date', {}).get('date')
-        release_date = None
-        if release_date_str and not game_data.get('release_date', {}).get('coming_soon', False):
-            try:
-                # Try common date formats
-                for fmt in ['%b %d, %Y', '%d %b, %Y', '%Y']:
-                    try:
-                        release_date = datetime.strptime(release_date_str, fmt).date()
-                        break
-                    except:
-                        continue
-            except:
-                pass
-        
-        # Extract data with safe defaults
-        name = game_data.get('name', 'Unknown')
-        short_desc = game_data.get('short_description', '')
-        header_image = game_data.get('header_image', '')
-        
-        metacritic = game_data.get('metacritic', {}).get('score')
-        recommendations = game_data.get('recommendations', {}).get('total', 0)
-        
-        # Platforms
-        platforms = game_data.get('platforms', {})
-        platform_windows = platforms.get('windows', False)
-        platform_mac = platforms.get('mac', False)
-        platform_linux = platforms.get('linux', False)
-        
-        # JSON fields - convert to JSON strings
-        genres = json.dumps(game_data.get('genres', []))
-        publishers = json.dumps(game_data.get('publishers', []))
-        developers = json.dumps(game_data.get('developers', []))
-        
-        # Insert or update
-        cur.execute("""
-            INSERT INTO games (
-                app_id, name, short_description, header_image_url,
-                release_date, metacritic_score, recommendation_count,
-                platform_windows, platform_mac, platform_linux,
-                genres, publishers, developers,
-                added_at, last_updated
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-            )
-            ON CONFLICT (app_id) DO UPDATE SET
-                name = EXCLUDED.name,
-                short_description = EXCLUDED.short_description,
-                header_image_url = EXCLUDED.header_image_url,
-                release_date = EXCLUDED.release_date,
-                metacritic_score = EXCLUDED.metacritic_score,
-                recommendation_count = EXCLUDED.recommendation_count,
-                platform_windows = EXCLUDED.platform_windows,
-                platform_mac = EXCLUDED.platform_mac,
-                platform_linux = EXCLUDED.platform_linux,
-                genres = EXCLUDED.genres,
-                publishers = EXCLUDED.publishers,
-                developers = EXCLUDED.developers,
-                last_updated = CURRENT_TIMESTAMP
-        """, (
-            app_id, name, short_desc, header_image,
-            release_date, metacritic, recommendations,
-            platform_windows, platform_mac, platform_linux,
-            genres, publishers, developers
-        ))
-        
+        execute_values(cur, """
+            INSERT INTO store_regions (cc, currency, last_seen_at)
+            VALUES %s
+            ON CONFLICT (cc) DO UPDATE SET
+                currency = EXCLUDED.currency,
+                last_seen_at = EXCLUDED.last_seen_at
+        """, sorted(region_currencies.items()), template="(%s, %s, CURRENT_TIMESTAMP)")
         conn.commit()
-        
     except Exception as e:
-        print(f"❌ Error saving game details for App ID {app_id}: {e}")
+        print(f"⚠️  Could not save region currencies: {e}")
         conn.rollback()
     finally:
         cur.close()
         conn.close()
 
-def collect_prices(app_ids, currency='us'):
-    """Collect prices for multiple games with progress tracking"""
-    total_games = len(app_ids)
-    print(f"\n🎮 Starting price collection for {total_games} games...")
-    print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*70}\n")
+def collect_price_overviews(app_ids, currency='us', batch_size=None, workers=None, limiter=None,
+                            resume_window_hours=None, run_kind='prices', regions=None):
+    """
+    Price-only collection for routine checks.
+    
+    Requests price_overview for ``batch_size`` games per call and only writes
+    the price tables; game metadata is left untouched. IDs missing from a
+    batch response are retried with single-ID requests. Like collect_prices,
+    an interrupted run is resumed from its last checkpoint.
+    
+    With several ``regions`` every batch is requested once per country code,
+    all through the same worker pool and rate budget. Prices are stored under
+    the currency Steam reports, so each region should price in a different
+    currency; a game counts as done once every region has been fetched.
+    
+    Returns:
+        list: App IDs that could not be fetched, even individually.
+    """
+    batch_size = batch_size or int(os.getenv("STEAM_PRICE_BATCH_SIZE", "50"))
+    workers = workers or int(os.getenv("STEAM_WORKERS", "4"))
+    limiter = limiter or steam_limiter
+    regions = regions or [currency]
     
     successful = 0
-    failed = 0
+    no_price = 0
+    failed_ids = []
+    requests_made = 0
+    region_currencies = {}
     start_time = datetime.now()
     
-    for idx, app_id in enumerate(app_ids, 1):
-        print(f"[{idx}/{total_games}] Processing App ID {app_id}...", end=" ")
+    with PriceWriter(get_db_connection()) as writer, \
+            CollectionRun.start(get_db_connection(), run_kind, ','.join(regions), app_ids, resume_window_hours,
+                                before_checkpoint=writer.flush) as run, \
+            worker_pool(workers) as executor:
+        app_ids = run.pending(app_ids)
+        total_games = len(app_ids)
+        batches = [app_ids[i:i + batch_size] for i in range(0, total_games, batch_size)]
+        print(f"\n💲 Starting price-only collection for {total_games} games in {', '.join(regions)} "
+              f"({len(batches) * len(regions)} batches of up to {batch_size}, {workers} workers)...")
+        print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Run {run.run_id}")
+        print(f"{'='*70}\n")
         
-        game_data = get_steam_game_price(app_id, currency)
-        if game_data:
-            game_name = game_data.get('name', 'Unknown')
-            
-            # Save both game details and price
-            save_price_to_db(app_id, game_data, currency)
-            successful += 1
-            
-            # Print success info
-            price_data = game_data.get('price_overview')
-            if price_data:
-                final_price = price_data.get('final', 0) / 100
-                discount = price_data.get('discount_percent', 0)
-                print(f"✓ {game_name} - ${final_price:.2f} ({discount}% off)")
-            else:
-                print(f"✓ {game_name} (Free to play)")
-        else:
-            failed += 1
-            print(f"✗ Failed")
+        # Regions still outstanding per game; a game is marked once all are in
+        outstanding = {app_id: len(regions) for app_id in app_ids}
+        games_failed = set()
         
-        # Progress summary every 50 games
-        if idx % 50 == 0:
-            elapsed = (datetime.now() - start_time).total_seconds()
-            avg_time = elapsed / idx
-            remaining = (total_games - idx) * avg_time
-            
-            print(f"\n{'─'*70}")
-            print(f"📊 Progress: {idx}/{total_games} ({idx/total_games*100:.1f}%)")
-            print(f"✅ Successful: {successful} | ❌ Failed: {failed}")
-            print(f"⏱️  Avg time per game: {avg_time:.1f}s | Est. remaining: {remaining/60:.1f} min")
-            print(f"{'─'*70}\n")
+        def finish(app_id, ok):
+            if not ok:
+                games_failed.add(app_id)
+            outstanding[app_id] -= 1
+            if outstanding[app_id] == 0:
+                run.mark(app_id, app_id not in games_failed)
+                if app_id in games_failed:
+                    failed_ids.append(app_id)
+        
+        pending = {
+            executor.submit(get_steam_prices_batch, batch, cc, limiter=limiter): (batch, cc)
+            for cc in regions
+            for batch in batches
+        }
         
-        # Wait between requests to avoid rate limiting
-        time.sleep(3)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, cc = pending.pop(future)
+                requests_made += 1
+                try:
+                    prices = future.result()
+                except Exception as e:
+                    print(f"❌ Unexpected error fetching {cc} batch starting at App ID {batch[0]}: {e}")
+                    prices = {}
+                
+                # Fall back to one request per game for anything the batch missed
+                missing = [app_id for app_id in batch if app_id not in prices]
+                if len(batch) > 1:
+                    for app_id in missing:
+                        retry = executor.submit(get_steam_prices_batch, [app_id], cc, limiter=limiter)
+                        pending[retry] = ([app_id], cc)
+                else:
+                    for app_id in missing:
+                        finish(app_id, False)
+                
+                for app_id, price_data in prices.items():
+                    if price_data:
+                        if price_data.get('currency'):
+                            region_currencies[cc] = price_data['currency']
+                        writer.add_price(app_id, price_data)
+                        successful += 1
+                    else:
+                        no_price += 1
+                    finish(app_id, True)
+                
+                if len(batch) > 1:
+                    print(f"✓ {cc} batch of {len(batch)}: {len(prices)} priced, {len(missing)} retried individually "
+                          f"(Total saved: {successful})")
+    
+    shared = {}
+    for cc, reported in region_currencies.items():
+        shared.setdefault(reported, []).append(cc)
+    for reported, ccs in shared.items():
+        if len(ccs) > 1:
+            print(f"⚠️  Regions {', '.join(ccs)} all price in {reported}; only one of them is kept per game")
+    
+    save_region_currencies(region_currencies)
+    limiter.save_state()
+    if successful:
+        bump_data_version()
     
-    # Final summary
     elapsed_total = (datetime.now() - start_time).total_seconds()
     print(f"\n{'='*70}")
-    print(f"✅ COLLECTION COMPLETE")
+    print(f"✅ PRICE COLLECTION COMPLETE")
     print(f"{'='*70}")
-    print(f"Total games processed: {total_games}")
-    print(f"Successful: {successful} ({successful/total_games*100:.1f}%)")
-    print(f"Failed: {failed} ({failed/total_games*100:.1f}%)")
+    print(f"Total games processed: {total_games} in {len(regions)} region(s)")
+    print(f"Prices saved: {successful} | No price (free): {no_price} | Failed games: {len(failed_ids)}")
+    print(f"Requests made: {requests_made} ({total_games * len(regions) / max(requests_made, 1):.1f} prices per request)")
+    print(f"Throughput: {total_games / max(elapsed_total, 1) * 60:.0f} games/min")
+    print(f"Database: {writer.stats['prices_written']} rows in {writer.stats['flushes']} flushes, "
+          f"{writer.stats['failed_rows']} failed")
     print(f"Total time: {elapsed_total/60:.1f} minutes")
-    print(f"Average: {elapsed_total/total_games:.1f} seconds per game")
+    print(f"Learned request rate: {limiter.rate:.2f} req/s")
     print(f"{'='*70}\n")
+    return failed_ids
+
+def refresh_game_metadata(app_ids, currency='us', workers=None, limiter=None):
+    """
+    Refresh games metadata from full appdetails documents.
+    
+    Only the games table is touched, and only for games whose metadata hash
+    changed; price observations are left to the price-only path.
+    """
+    workers = workers or int(os.getenv("STEAM_WORKERS", "4"))
+    limiter = limiter or steam_limiter
+    
+    total_games = len(app_ids)
+    print(f"\n📝 Refreshing metadata for {total_games} games...")
+    
+    fetched = 0
+    failed = 0
+    
+    with PriceWriter(get_db_connection()) as writer, worker_pool(workers) as executor:
+        futures = {
+            executor.submit(get_steam_game_price, app_id, currency, limiter=limiter): app_id
+            for app_id in app_ids
+        }
+        
+        for idx, future in enumerate(as_completed(futures), 1):
+            app_id = futures[future]
+            try:
+                game_data = future.result()
+            except Exception as e:
+                print(f"❌ Unexpected error fetching App ID {app_id}: {e}")
+                game_data = None
+            
+            if not game_data:
+                failed += 1
+            else:
+                writer.add_game_details(extract_game_details(app_id, game_data))
+                fetched += 1
+            
+            if idx % 50 == 0:
+                print(f"[{idx}/{total_games}] fetched {fetched}, failed {failed}")
+    
+    updated = writer.stats['details_updated']
+    unchanged = writer.stats['details_unchanged']
+    limiter.save_state()
+    if updated:
+        bump_data_version()
+    
+    print(f"✅ Metadata refresh complete: {updated} updated, {unchanged} unchanged, "
+          f"{failed + writer.stats['failed_rows']} failed")
 
 if __name__ == "__main__":
-    # Import the function to get tracked games
+    parser = argparse.ArgumentParser(description="Collect Steam prices for tracked games")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--prices-only', action='store_true',
+                      help="Batch price_overview requests and skip game metadata")
+    mode.add_argument('--metadata-only', action='store_true',
+                      help="Only refresh metadata for games that are due")
+    mode.add_argument('--refresh-all-metadata', action='store_true',
+                      help="Refresh metadata for every tracked game, due or not")
+    mode.add_argument('--full', action='store_true',
+                      help="Fetch full appdetails for every game (prices and metadata)")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Start a new collection run even if the last one was interrupted")
+    parser.add_argument('--metadata-max-age-days', type=float,
+                        default=float(os.getenv("METADATA_MAX_AGE_DAYS", "7")),
+                        help="Metadata older than this is refreshed (default: 7)")
+    args = parser.parse_args()
+    
+    # Import the functions to get tracked games
     try:
-        from game_list_manager import get_tracked_game_ids
+        from game_list_manager import get_tracked_game_ids, get_games_due_for_metadata
         games_to_track = get_tracked_game_ids()
     except Exception as e:
         print(f"❌ Could not load tracked games: {e}")
         print("Using fallback list...")
         games_to_track = [292030, 1091500, 271590]  # Fallback
+        get_games_due_for_metadata = None
     
     if not games_to_track:
         print("⚠️  No games to track. Run game_list_manager.py first.")
@@ -276,5 +527,25 @@ if __name__ == "__main__":
     
     print(f"📊 Tracking {len(games_to_track)} games")
     
-    currency = os.getenv("CURRENCY", "us")
-    collect_prices(games_to_track, currency)
\ No newline at end of file
+    # The first region is the primary one: full appdetails and metadata use it
+    regions = get_regions()
+    currency = regions[0]
+    resume_window_hours = 0 if args.no_resume else None
+    if args.full:
+        collect_prices(games_to_track, currency, resume_window_hours=resume_window_hours)
+        if len(regions) > 1:
+            collect_price_overviews(games_to_track, resume_window_hours=resume_window_hours, regions=regions[1:])
+        sys.exit(0)
+    
+    if not args.metadata_only and not args.refresh_all_metadata:
+        collect_price_overviews(games_to_track, resume_window_hours=resume_window_hours, regions=regions)
+    
+    if not args.prices_only:
+        if args.refresh_all_metadata or get_games_due_for_metadata is None:
+            due = games_to_track
+        else:
+            due = get_games_due_for_metadata(args.metadata_max_age_days)
+        if due:
+            refresh_game_metadata(due, currency)
+        else:
+            print("📝 No metadata due for refresh")
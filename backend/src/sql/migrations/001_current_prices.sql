@@ -0,0 +1,28 @@
+-- Migration 001: materialized current price per game/currency
+-- Safe to re-run; the backfill can also be repeated at any time with
+--   python backend/src/collectors/maintenance.py rebuild-current-prices
+
+CREATE TABLE IF NOT EXISTS current_prices (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    initial_price INTEGER,
+    final_price INTEGER,
+    discount_percent INTEGER,
+    checked_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_current_prices_discount ON current_prices(discount_percent) WHERE discount_percent > 0;
+
+-- Backfill from existing history
+INSERT INTO current_prices (app_id, currency, initial_price, final_price, discount_percent, checked_at)
+SELECT DISTINCT ON (app_id, currency)
+    app_id, currency, initial_price, final_price, discount_percent, checked_at
+FROM price_history
+WHERE currency IS NOT NULL AND checked_at IS NOT NULL
+ORDER BY app_id, currency, checked_at DESC
+ON CONFLICT (app_id, currency) DO UPDATE SET
+    initial_price = EXCLUDED.initial_price,
+    final_price = EXCLUDED.final_price,
+    discount_percent = EXCLUDED.discount_percent,
+    checked_at = EXCLUDED.checked_at;
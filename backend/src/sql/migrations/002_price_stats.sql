@@ -0,0 +1,53 @@
+-- Migration 002: incrementally maintained per-game price statistics
+-- Safe to re-run; the backfill can also be repeated at any time with
+--   python backend/src/collectors/maintenance.py rebuild-price-stats
+
+CREATE TABLE IF NOT EXISTS price_stats (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    low_90d INTEGER,
+    low_90d_at TIMESTAMP,
+    all_time_low INTEGER,
+    all_time_high INTEGER,
+    price_sum BIGINT DEFAULT 0,
+    observation_count INTEGER DEFAULT 0,
+    last_discount_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_stats_low_90d_at ON price_stats(low_90d_at);
+
+-- Backfill all-time figures from existing history
+INSERT INTO price_stats
+(app_id, currency, all_time_low, all_time_high, price_sum, observation_count, last_discount_at, updated_at)
+SELECT
+    app_id,
+    currency,
+    MIN(final_price),
+    MAX(final_price),
+    SUM(final_price),
+    COUNT(*),
+    MAX(checked_at) FILTER (WHERE discount_percent > 0),
+    MAX(checked_at)
+FROM price_history
+WHERE currency IS NOT NULL AND final_price IS NOT NULL
+GROUP BY app_id, currency
+ON CONFLICT (app_id, currency) DO UPDATE SET
+    all_time_low = EXCLUDED.all_time_low,
+    all_time_high = EXCLUDED.all_time_high,
+    price_sum = EXCLUDED.price_sum,
+    observation_count = EXCLUDED.observation_count,
+    last_discount_at = EXCLUDED.last_discount_at,
+    updated_at = EXCLUDED.updated_at;
+
+-- Backfill 90-day lows
+UPDATE price_stats ps
+SET low_90d = w.final_price, low_90d_at = w.checked_at
+FROM (
+    SELECT DISTINCT ON (app_id, currency) app_id, currency, final_price, checked_at
+    FROM price_history
+    WHERE checked_at >= NOW() - INTERVAL '90 days' AND final_price IS NOT NULL
+    ORDER BY app_id, currency, final_price ASC, checked_at DESC
+) w
+WHERE ps.app_id = w.app_id AND ps.currency = w.currency;
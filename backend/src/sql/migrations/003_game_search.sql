@@ -0,0 +1,42 @@
+-- Migration 003: indexed search for games (requires the pg_trgm extension)
+-- Safe to re-run.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE games ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION games_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', COALESCE(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', COALESCE((
+            SELECT string_agg(genre->>'description', ' ')
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(NEW.genres) = 'array' THEN NEW.genres ELSE '[]'::jsonb END
+            ) AS genre
+        ), '')), 'B') ||
+        setweight(to_tsvector('simple', COALESCE((
+            SELECT string_agg(company, ' ')
+            FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(NEW.developers) = 'array' THEN NEW.developers ELSE '[]'::jsonb END
+            ) AS company
+        ), '') || ' ' || COALESCE((
+            SELECT string_agg(company, ' ')
+            FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(NEW.publishers) = 'array' THEN NEW.publishers ELSE '[]'::jsonb END
+            ) AS company
+        ), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_games_search_vector ON games;
+CREATE TRIGGER trg_games_search_vector
+    BEFORE INSERT OR UPDATE OF name, genres, developers, publishers ON games
+    FOR EACH ROW EXECUTE FUNCTION games_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS idx_games_search_vector ON games USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_games_name_trgm ON games USING GIN (LOWER(name) gin_trgm_ops);
+
+-- Backfill: touching name fires the trigger for existing rows
+UPDATE games SET name = name WHERE search_vector IS NULL;
@@ -0,0 +1,12 @@
+-- Migration 004: data version counters for API cache invalidation
+-- Safe to re-run.
+
+-- Version counters bumped by the collectors after each run; API workers
+-- poll this row to know when their cached responses are stale
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name, version) VALUES ('prices', 0) ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,7 @@
+-- Migration 005: staleness-driven metadata refresh
+-- Safe to re-run.
+
+ALTER TABLE games ADD COLUMN IF NOT EXISTS metadata_hash VARCHAR(64);
+ALTER TABLE games_to_track ADD COLUMN IF NOT EXISTS metadata_checked_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_metadata_checked_at ON games_to_track(metadata_checked_at);
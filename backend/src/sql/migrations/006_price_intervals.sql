@@ -0,0 +1,76 @@
+-- Migration 006: change-only price history
+-- price_history rows become intervals [checked_at, last_seen_at]; runs of
+-- identical consecutive observations are compacted into one row.
+-- Safe to re-run; a second pass finds nothing left to merge.
+
+ALTER TABLE price_history ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP;
+ALTER TABLE price_history ADD COLUMN IF NOT EXISTS observation_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE current_prices ADD COLUMN IF NOT EXISTS history_id INTEGER;
+
+BEGIN;
+
+UPDATE price_history SET last_seen_at = checked_at WHERE last_seen_at IS NULL;
+
+-- Number each run of unchanged prices per game/currency
+CREATE TEMP TABLE price_runs ON COMMIT DROP AS
+SELECT
+    id,
+    app_id,
+    currency,
+    checked_at,
+    last_seen_at,
+    observation_count,
+    SUM(CASE WHEN changed THEN 1 ELSE 0 END)
+        OVER (PARTITION BY app_id, currency ORDER BY checked_at, id) AS run
+FROM (
+    SELECT
+        *,
+        LAG(id) OVER w IS NULL
+            OR initial_price IS DISTINCT FROM LAG(initial_price) OVER w
+            OR final_price IS DISTINCT FROM LAG(final_price) OVER w
+            OR discount_percent IS DISTINCT FROM LAG(discount_percent) OVER w AS changed
+    FROM price_history
+    WINDOW w AS (PARTITION BY app_id, currency ORDER BY checked_at, id)
+) ordered;
+
+CREATE TEMP TABLE price_run_heads ON COMMIT DROP AS
+SELECT
+    (array_agg(id ORDER BY checked_at, id))[1] AS keep_id,
+    app_id,
+    currency,
+    run,
+    MAX(last_seen_at) AS last_seen_at,
+    SUM(observation_count) AS observation_count
+FROM price_runs
+GROUP BY app_id, currency, run
+HAVING COUNT(*) > 1;
+
+-- Stretch the first row of each run over the whole run...
+UPDATE price_history ph
+SET last_seen_at = h.last_seen_at, observation_count = h.observation_count
+FROM price_run_heads h
+WHERE ph.id = h.keep_id;
+
+-- ...and drop the rest of it
+DELETE FROM price_history ph
+USING price_runs r, price_run_heads h
+WHERE ph.id = r.id
+    AND r.app_id = h.app_id
+    AND r.currency IS NOT DISTINCT FROM h.currency
+    AND r.run = h.run
+    AND r.id <> h.keep_id;
+
+-- Point each snapshot at its open interval so new observations extend it
+UPDATE current_prices cp
+SET history_id = latest.id
+FROM (
+    SELECT DISTINCT ON (app_id, currency) id, app_id, currency
+    FROM price_history
+    WHERE currency IS NOT NULL
+    ORDER BY app_id, currency, checked_at DESC, id DESC
+) latest
+WHERE cp.app_id = latest.app_id AND cp.currency = latest.currency;
+
+COMMIT;
+
+VACUUM ANALYZE price_history;
@@ -0,0 +1,121 @@
+-- Migration 007: monthly partitioned price_history with daily downsampling
+-- Rebuilds price_history as a table partitioned by month on checked_at.
+-- Intervals that span a month boundary are split at the boundary; the
+-- continuation rows carry observation_count 0 so averages are unchanged.
+-- Run once (requires migration 006), in a quiet window: the copy holds an
+-- exclusive lock on price_history until it commits.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION ensure_price_history_partitions(from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_month LOOP
+        partition_name := 'price_history_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF price_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql;
+
+LOCK TABLE price_history IN ACCESS EXCLUSIVE MODE;
+
+ALTER TABLE price_history RENAME TO price_history_unpartitioned;
+ALTER INDEX idx_app_id_checked RENAME TO idx_app_id_checked_unpartitioned;
+
+CREATE TABLE price_history (
+    id BIGINT NOT NULL DEFAULT nextval('price_history_id_seq'),
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10),
+    initial_price INTEGER,
+    final_price INTEGER,
+    discount_percent INTEGER,
+    checked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP,
+    observation_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (id, checked_at)
+) PARTITION BY RANGE (checked_at);
+
+CREATE TABLE price_history_default PARTITION OF price_history DEFAULT;
+CREATE INDEX idx_app_id_checked ON price_history(app_id, checked_at);
+
+SELECT ensure_price_history_partitions(
+    COALESCE((SELECT MIN(checked_at) FROM price_history_unpartitioned)::date, CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+-- Each interval keeps its id, clipped to the end of its starting month...
+INSERT INTO price_history
+(id, app_id, currency, initial_price, final_price, discount_percent, checked_at, last_seen_at, observation_count)
+SELECT
+    id, app_id, currency, initial_price, final_price, discount_percent, checked_at,
+    LEAST(
+        COALESCE(last_seen_at, checked_at),
+        date_trunc('month', checked_at) + INTERVAL '1 month' - INTERVAL '1 microsecond'
+    ),
+    observation_count
+FROM price_history_unpartitioned
+WHERE checked_at IS NOT NULL;
+
+-- ...and gets one continuation row per later month it was still seen in
+INSERT INTO price_history
+(app_id, currency, initial_price, final_price, discount_percent, checked_at, last_seen_at, observation_count)
+SELECT
+    o.app_id, o.currency, o.initial_price, o.final_price, o.discount_percent,
+    m.month_start,
+    LEAST(o.last_seen_at, m.month_start + INTERVAL '1 month' - INTERVAL '1 microsecond'),
+    0
+FROM price_history_unpartitioned o
+CROSS JOIN LATERAL generate_series(
+    date_trunc('month', o.checked_at) + INTERVAL '1 month',
+    date_trunc('month', o.last_seen_at),
+    INTERVAL '1 month'
+) AS m(month_start)
+WHERE o.last_seen_at >= date_trunc('month', o.checked_at) + INTERVAL '1 month';
+
+ALTER SEQUENCE price_history_id_seq AS BIGINT;
+ALTER SEQUENCE price_history_id_seq OWNED BY price_history.id;
+
+-- Relink snapshots to their open interval, now addressed by (id, checked_at)
+ALTER TABLE current_prices ALTER COLUMN history_id TYPE BIGINT;
+ALTER TABLE current_prices ADD COLUMN IF NOT EXISTS history_checked_at TIMESTAMP;
+
+UPDATE current_prices cp
+SET history_id = latest.id, history_checked_at = latest.checked_at
+FROM (
+    SELECT DISTINCT ON (app_id, currency) id, app_id, currency, checked_at
+    FROM price_history
+    WHERE currency IS NOT NULL
+    ORDER BY app_id, currency, checked_at DESC, id DESC
+) latest
+WHERE cp.app_id = latest.app_id AND cp.currency = latest.currency;
+
+DROP TABLE price_history_unpartitioned;
+
+CREATE TABLE IF NOT EXISTS price_history_daily (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    day DATE NOT NULL,
+    min_price INTEGER,
+    max_price INTEGER,
+    close_price INTEGER,
+    max_discount_percent INTEGER,
+    price_sum BIGINT DEFAULT 0,
+    observation_count INTEGER DEFAULT 0,
+    PRIMARY KEY (app_id, currency, day)
+);
+
+COMMIT;
+
+ANALYZE price_history;
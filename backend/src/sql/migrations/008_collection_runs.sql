@@ -0,0 +1,26 @@
+-- Migration 008: resumable collection runs
+-- Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS collection_runs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    currency VARCHAR(10),
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    last_checkpoint_at TIMESTAMP,
+    total_items INTEGER,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    resumes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_collection_runs_kind_started ON collection_runs(kind, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS collection_run_items (
+    run_id BIGINT REFERENCES collection_runs(id) ON DELETE CASCADE,
+    app_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    finished_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, app_id)
+);
@@ -0,0 +1,19 @@
+-- Migration 009: priority-based price polling
+-- Safe to re-run.
+
+ALTER TABLE games_to_track ADD COLUMN IF NOT EXISTS next_due_at TIMESTAMP;
+ALTER TABLE games_to_track ADD COLUMN IF NOT EXISTS last_polled_at TIMESTAMP;
+
+-- Never-scheduled games (NULL) come first, then the most overdue
+CREATE INDEX IF NOT EXISTS idx_games_to_track_next_due ON games_to_track(next_due_at NULLS FIRST)
+    WHERE status = 'active' AND is_free_to_play = FALSE;
+
+CREATE TABLE IF NOT EXISTS sale_windows (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    starts_at TIMESTAMP NOT NULL,
+    ends_at TIMESTAMP NOT NULL,
+    CHECK (ends_at > starts_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sale_windows_ends_at ON sale_windows(ends_at);
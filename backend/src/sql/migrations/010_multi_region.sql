@@ -0,0 +1,18 @@
+-- Migration 010: multi-region price collection
+-- Safe to re-run. Building the price_history index reads every partition;
+-- on a large table run it outside peak hours.
+
+-- Country code -> currency Steam prices it in, maintained by the collector
+CREATE TABLE IF NOT EXISTS store_regions (
+    cc VARCHAR(10) PRIMARY KEY,
+    currency VARCHAR(10) NOT NULL,
+    last_seen_at TIMESTAMP
+);
+
+-- A run now records every region it collected ("us,gb,de")
+ALTER TABLE collection_runs ALTER COLUMN currency TYPE VARCHAR(100);
+
+-- Per-currency deals and per-currency history for one game
+CREATE INDEX IF NOT EXISTS idx_current_prices_currency_discount ON current_prices(currency, app_id)
+    WHERE discount_percent > 0;
+CREATE INDEX IF NOT EXISTS idx_price_history_app_currency_checked ON price_history(app_id, currency, checked_at);
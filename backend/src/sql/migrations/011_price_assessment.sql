@@ -0,0 +1,64 @@
+-- Migration 011: price grade and forecast stored with the current price
+-- Safe to re-run.
+
+ALTER TABLE current_prices ADD COLUMN IF NOT EXISTS price_grade VARCHAR(2);
+ALTER TABLE current_prices ADD COLUMN IF NOT EXISTS forecast VARCHAR(10);
+ALTER TABLE current_prices ADD COLUMN IF NOT EXISTS assessed_at TIMESTAMP;
+
+-- Deal grade of a price against its 90-day and all-time lows (cents).
+-- Same thresholds the API used to apply per request.
+CREATE OR REPLACE FUNCTION price_grade(current_price INTEGER, low_90d INTEGER, all_time_low INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN COALESCE(current_price, 0) = 0 THEN 'A+'
+        WHEN all_time_low > 0 AND current_price <= all_time_low THEN 'A+'
+        WHEN current_price <= r.reference THEN 'A+'
+        WHEN current_price <= r.reference * 1.1 THEN 'A'
+        WHEN current_price <= r.reference * 1.2 THEN 'B+'
+        WHEN current_price <= r.reference * 1.3 THEN 'B'
+        WHEN current_price <= r.reference * 1.5 THEN 'C+'
+        WHEN current_price <= r.reference * 1.8 THEN 'C'
+        WHEN current_price <= r.reference * 2.0 THEN 'D'
+        ELSE 'F'
+    END
+    FROM (SELECT COALESCE(NULLIF(low_90d, 0), NULLIF(all_time_low, 0), current_price) AS reference) r
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Position of a grade from best (1) to worst (8), for sorting
+CREATE OR REPLACE FUNCTION price_grade_rank(grade VARCHAR)
+RETURNS INTEGER AS $$
+    SELECT array_position(ARRAY['A+', 'A', 'B+', 'B', 'C+', 'C', 'D', 'F']::VARCHAR[], grade)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Direction of a price move of more than 5% since the reference price
+CREATE OR REPLACE FUNCTION price_forecast(reference_price INTEGER, current_price INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN reference_price IS NULL OR reference_price <= 0 OR current_price IS NULL THEN 'stable'
+        WHEN (current_price - reference_price) * 100.0 / reference_price < -5 THEN 'falling'
+        WHEN (current_price - reference_price) * 100.0 / reference_price > 5 THEN 'rising'
+        ELSE 'stable'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE INDEX IF NOT EXISTS idx_current_prices_grade ON current_prices(price_grade);
+CREATE INDEX IF NOT EXISTS idx_current_prices_forecast ON current_prices(forecast);
+
+-- Assess every existing row; afterwards the collector keeps them current
+-- (same statement as maintenance.py assess-prices)
+UPDATE current_prices cp
+SET price_grade = price_grade(cp.final_price, ps.low_90d, ps.all_time_low),
+    forecast = price_forecast(ref.final_price, cp.final_price),
+    assessed_at = LOCALTIMESTAMP
+FROM current_prices v
+LEFT JOIN price_stats ps ON ps.app_id = v.app_id AND ps.currency = v.currency
+LEFT JOIN LATERAL (
+    SELECT h.final_price
+    FROM price_history h
+    WHERE h.app_id = v.app_id AND h.currency = v.currency
+        AND h.last_seen_at >= LOCALTIMESTAMP - INTERVAL '7 days'
+        AND h.checked_at >= date_trunc('month', LOCALTIMESTAMP - INTERVAL '7 days')
+    ORDER BY h.checked_at
+    LIMIT 1
+) ref ON TRUE
+WHERE cp.app_id = v.app_id AND cp.currency = v.currency;
@@ -0,0 +1,21 @@
+-- Migration 012: batch price outlook per game and currency
+-- Safe to re-run. The table is filled by collectors/forecast_job.py.
+
+CREATE TABLE IF NOT EXISTS price_forecasts (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    history_days INTEGER,
+    trend_pct_per_week REAL,
+    volatility REAL,
+    sale_count INTEGER,
+    sale_interval_days REAL,
+    sale_regularity REAL,
+    expected_sale_in_days REAL,
+    on_sale BOOLEAN,
+    drop_probability REAL,
+    forecast VARCHAR(10),
+    computed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_forecasts_drop_probability ON price_forecasts(drop_probability DESC);
@@ -16,6 +16,7 @@ CREATE TABLE IF NOT EXISTS games (
     -- Metadata
     added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata_hash VARCHAR(64), -- content hash of the appdetails fields below
     
     -- Store as JSON for flexibility
     genres JSONB,
@@ -23,19 +24,76 @@ CREATE TABLE IF NOT EXISTS games (
     developers JSONB
 );
 
--- Price history table to track prices over time
+-- Price history table to track prices over time.
+-- Each row is an interval: the price first seen at checked_at and still seen
+-- at last_seen_at. The collector extends the current interval while prices
+-- are unchanged (PRICE_HISTORY_MODE=intervals) instead of adding a row per poll.
+-- Partitioned by month on checked_at; an interval never crosses a month
+-- boundary, so "seen since X" queries can prune on
+-- checked_at >= date_trunc('month', X).
+-- Timestamps are naive UTC: collector and API connections set TimeZone=UTC,
+-- so LOCALTIMESTAMP is UTC whatever the server's time zone.
 CREATE TABLE IF NOT EXISTS price_history (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     app_id INTEGER REFERENCES games(app_id),
     currency VARCHAR(10),
     initial_price INTEGER,
     final_price INTEGER,
     discount_percent INTEGER,
-    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    checked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP,
+    observation_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (id, checked_at)
+) PARTITION BY RANGE (checked_at);
+
+-- Catches rows for months whose partition was not created in time
+CREATE TABLE IF NOT EXISTS price_history_default PARTITION OF price_history DEFAULT;
+
+-- Create the monthly partitions covering [from_month, to_month]; run ahead
+-- of time by maintenance.py create-partitions
+CREATE OR REPLACE FUNCTION ensure_price_history_partitions(from_month DATE, to_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_month LOOP
+        partition_name := 'price_history_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF price_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_price_history_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::date);
+
+-- Daily min/max/close of partitions past the retention age, written by
+-- maintenance.py downsample-history before the raw partition is detached.
+-- Observations are counted on the day their interval started.
+CREATE TABLE IF NOT EXISTS price_history_daily (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    day DATE NOT NULL,
+    min_price INTEGER,
+    max_price INTEGER,
+    close_price INTEGER,
+    max_discount_percent INTEGER,
+    price_sum BIGINT DEFAULT 0,
+    observation_count INTEGER DEFAULT 0,
+    PRIMARY KEY (app_id, currency, day)
 );
 
 -- Create indexes AFTER tables are created
 CREATE INDEX IF NOT EXISTS idx_app_id_checked ON price_history(app_id, checked_at);
+CREATE INDEX IF NOT EXISTS idx_price_history_app_currency_checked ON price_history(app_id, currency, checked_at);
 CREATE INDEX IF NOT EXISTS idx_games_release_date ON games(release_date);
 CREATE INDEX IF NOT EXISTS idx_games_metacritic_score ON games(metacritic_score);
 CREATE INDEX IF NOT EXISTS idx_games_recommendation_count ON games(recommendation_count);
@@ -48,9 +106,208 @@ CREATE TABLE IF NOT EXISTS games_to_track (
     last_seen_in_top TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     source VARCHAR(50),
     is_free_to_play BOOLEAN DEFAULT FALSE,
-    status VARCHAR(20) DEFAULT 'active' -- active, failed, removed
+    status VARCHAR(20) DEFAULT 'active', -- active, failed, removed
+    metadata_checked_at TIMESTAMP, -- last appdetails metadata fetch, changed or not
+    next_due_at TIMESTAMP, -- next scheduled price poll (poll_scheduler.py); NULL = due now
+    last_polled_at TIMESTAMP
 );
 
 -- Index for faster queries
 CREATE INDEX IF NOT EXISTS idx_status ON games_to_track(status);
-CREATE INDEX IF NOT EXISTS idx_free_to_play ON games_to_track(is_free_to_play);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_free_to_play ON games_to_track(is_free_to_play);
+CREATE INDEX IF NOT EXISTS idx_metadata_checked_at ON games_to_track(metadata_checked_at);
+CREATE INDEX IF NOT EXISTS idx_games_to_track_next_due ON games_to_track(next_due_at NULLS FIRST)
+    WHERE status = 'active' AND is_free_to_play = FALSE;
+
+-- Latest observed price per game and currency, maintained by the collector
+-- alongside each price_history write so the API never scans full history
+CREATE TABLE IF NOT EXISTS current_prices (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    initial_price INTEGER,
+    final_price INTEGER,
+    discount_percent INTEGER,
+    checked_at TIMESTAMP NOT NULL,
+    history_id BIGINT, -- open price_history interval for this price...
+    history_checked_at TIMESTAMP, -- ...and its partition key
+    price_grade VARCHAR(2), -- A+ .. F, see price_grade()
+    forecast VARCHAR(10), -- falling, stable, rising over the last 7 days
+    assessed_at TIMESTAMP,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_current_prices_discount ON current_prices(discount_percent) WHERE discount_percent > 0;
+CREATE INDEX IF NOT EXISTS idx_current_prices_currency_discount ON current_prices(currency, app_id)
+    WHERE discount_percent > 0;
+CREATE INDEX IF NOT EXISTS idx_current_prices_grade ON current_prices(price_grade);
+CREATE INDEX IF NOT EXISTS idx_current_prices_forecast ON current_prices(forecast);
+
+-- Per-game price statistics, updated incrementally by the collector.
+-- low_90d is refreshed nightly (maintenance.py expire-price-stats) once the
+-- observation it came from falls out of the 90-day window.
+CREATE TABLE IF NOT EXISTS price_stats (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    low_90d INTEGER,
+    low_90d_at TIMESTAMP,
+    all_time_low INTEGER,
+    all_time_high INTEGER,
+    price_sum BIGINT DEFAULT 0,
+    observation_count INTEGER DEFAULT 0,
+    last_discount_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_stats_low_90d_at ON price_stats(low_90d_at);
+
+-- Deal grade of a price against its 90-day and all-time lows (cents).
+-- Stored in current_prices by the collector as prices land (PriceWriter).
+CREATE OR REPLACE FUNCTION price_grade(current_price INTEGER, low_90d INTEGER, all_time_low INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN COALESCE(current_price, 0) = 0 THEN 'A+'
+        WHEN all_time_low > 0 AND current_price <= all_time_low THEN 'A+'
+        WHEN current_price <= r.reference THEN 'A+'
+        WHEN current_price <= r.reference * 1.1 THEN 'A'
+        WHEN current_price <= r.reference * 1.2 THEN 'B+'
+        WHEN current_price <= r.reference * 1.3 THEN 'B'
+        WHEN current_price <= r.reference * 1.5 THEN 'C+'
+        WHEN current_price <= r.reference * 1.8 THEN 'C'
+        WHEN current_price <= r.reference * 2.0 THEN 'D'
+        ELSE 'F'
+    END
+    FROM (SELECT COALESCE(NULLIF(low_90d, 0), NULLIF(all_time_low, 0), current_price) AS reference) r
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Position of a grade from best (1) to worst (8), for sorting
+CREATE OR REPLACE FUNCTION price_grade_rank(grade VARCHAR)
+RETURNS INTEGER AS $$
+    SELECT array_position(ARRAY['A+', 'A', 'B+', 'B', 'C+', 'C', 'D', 'F']::VARCHAR[], grade)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Direction of a price move of more than 5% since the reference price
+CREATE OR REPLACE FUNCTION price_forecast(reference_price INTEGER, current_price INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN reference_price IS NULL OR reference_price <= 0 OR current_price IS NULL THEN 'stable'
+        WHEN (current_price - reference_price) * 100.0 / reference_price < -5 THEN 'falling'
+        WHEN (current_price - reference_price) * 100.0 / reference_price > 5 THEN 'rising'
+        ELSE 'stable'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Full-text and trigram search over name, genres, developers and publishers
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE games ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION games_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', COALESCE(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', COALESCE((
+            SELECT string_agg(genre->>'description', ' ')
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(NEW.genres) = 'array' THEN NEW.genres ELSE '[]'::jsonb END
+            ) AS genre
+        ), '')), 'B') ||
+        setweight(to_tsvector('simple', COALESCE((
+            SELECT string_agg(company, ' ')
+            FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(NEW.developers) = 'array' THEN NEW.developers ELSE '[]'::jsonb END
+            ) AS company
+        ), '') || ' ' || COALESCE((
+            SELECT string_agg(company, ' ')
+            FROM jsonb_array_elements_text(
+                CASE WHEN jsonb_typeof(NEW.publishers) = 'array' THEN NEW.publishers ELSE '[]'::jsonb END
+            ) AS company
+        ), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_games_search_vector ON games;
+CREATE TRIGGER trg_games_search_vector
+    BEFORE INSERT OR UPDATE OF name, genres, developers, publishers ON games
+    FOR EACH ROW EXECUTE FUNCTION games_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS idx_games_search_vector ON games USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_games_name_trgm ON games USING GIN (LOWER(name) gin_trgm_ops);
+
+-- Version counters bumped by the collectors after each run; API workers
+-- poll this row to know when their cached responses are stale
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (name, version) VALUES ('prices', 0) ON CONFLICT (name) DO NOTHING;
+
+-- Collector runs and per-game progress, so an interrupted run resumes where
+-- it stopped and run history can be reported (maintenance.py run-report)
+CREATE TABLE IF NOT EXISTS collection_runs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL, -- full, prices, scheduled
+    currency VARCHAR(100), -- comma-separated regions collected
+    status VARCHAR(20) NOT NULL DEFAULT 'running', -- running, interrupted, completed, abandoned
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    last_checkpoint_at TIMESTAMP,
+    total_items INTEGER,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    resumes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_collection_runs_kind_started ON collection_runs(kind, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS collection_run_items (
+    run_id BIGINT REFERENCES collection_runs(id) ON DELETE CASCADE,
+    app_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL, -- done, failed
+    finished_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, app_id)
+);
+
+-- Store-wide sales (seasonal events); the poll scheduler checks every game
+-- more often from shortly before a window opens until it closes
+CREATE TABLE IF NOT EXISTS sale_windows (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    starts_at TIMESTAMP NOT NULL,
+    ends_at TIMESTAMP NOT NULL,
+    CHECK (ends_at > starts_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sale_windows_ends_at ON sale_windows(ends_at);
+
+-- Country code -> currency Steam prices it in, maintained by the collector
+-- so the API can accept region=de as well as currency=EUR
+CREATE TABLE IF NOT EXISTS store_regions (
+    cc VARCHAR(10) PRIMARY KEY,
+    currency VARCHAR(10) NOT NULL,
+    last_seen_at TIMESTAMP
+);
+
+-- Price outlook per game and currency, recomputed in one batch by
+-- collectors/forecast_job.py
+CREATE TABLE IF NOT EXISTS price_forecasts (
+    app_id INTEGER REFERENCES games(app_id),
+    currency VARCHAR(10) NOT NULL,
+    history_days INTEGER,
+    trend_pct_per_week REAL,
+    volatility REAL,
+    sale_count INTEGER,
+    sale_interval_days REAL,
+    sale_regularity REAL,
+    expected_sale_in_days REAL,
+    on_sale BOOLEAN,
+    drop_probability REAL,
+    forecast VARCHAR(10),
+    computed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (app_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_forecasts_drop_probability ON price_forecasts(drop_probability DESC);
@@ -38,10 +38,25 @@ class ApiClient {
     if (params.priceMin !== undefined) queryParams.append('priceMin', params.priceMin);
     if (params.priceMax !== undefined) queryParams.append('priceMax', params.priceMax);
     
+    // currency ('EUR') or region ('de') picks which collected prices are shown
+    if (params.currency) queryParams.append('currency', params.currency);
+    if (params.region) queryParams.append('region', params.region);
+    
+    // Stored deal assessment: grade ('A+,A'), forecast ('falling'), sort ('grade')
+    if (params.grade) queryParams.append('grade', params.grade);
+    if (params.forecast) queryParams.append('forecast', params.forecast);
+    if (params.sort) queryParams.append('sort', params.sort);
+    // Batch outlook: only games at least this likely (0-1) to drop soon
+    if (params.dropProbabilityMin) queryParams.append('dropProbabilityMin', params.dropProbabilityMin);
+    
     // Support both pagination styles
     if (params.page !== undefined) queryParams.append('page', params.page);
     if (params.perPage !== undefined) queryParams.append('perPage', params.perPage);
     
+    // Cursor pagination: pass pagination.nextCursor from the previous response
+    if (params.after) queryParams.append('after', params.after);
+    if (params.includeTotal) queryParams.append('includeTotal', 'true');
+    
     // Legacy support (can be removed if not used elsewhere)
     if (params.limit) queryParams.append('limit', params.limit);
     if (params.offset) queryParams.append('offset', params.offset);
@@ -54,16 +69,52 @@ class ApiClient {
     return this.request(endpoint);
   }
 
-  async getGameDetails(appId) {
-    return this.request(`/api/games/${appId}`);
+  async getGameDetails(appId, params = {}) {
+    const queryParams = new URLSearchParams();
+    
+    if (params.currency) queryParams.append('currency', params.currency);
+    if (params.region) queryParams.append('region', params.region);
+    
+    const queryString = queryParams.toString();
+    return this.request(`/api/games/${appId}${queryString ? `?${queryString}` : ''}`);
   }
 
-  async getPriceHistory(appId) {
-    return this.request(`/api/games/${appId}/price-history`);
+  async getPriceHistory(appId, params = {}) {
+    const queryParams = new URLSearchParams();
+    
+    // from/to accept ISO dates; points caps the response size (server default 200)
+    if (params.from) queryParams.append('from', params.from);
+    if (params.to) queryParams.append('to', params.to);
+    if (params.points !== undefined) queryParams.append('points', params.points);
+    if (params.currency) queryParams.append('currency', params.currency);
+    if (params.region) queryParams.append('region', params.region);
+    
+    const queryString = queryParams.toString();
+    return this.request(`/api/games/${appId}/price-history${queryString ? `?${queryString}` : ''}`);
   }
 
-  async getDeals() {
-    return this.request('/api/deals');
+  // Without page/perPage/after this returns a plain array (capped server-side);
+  // with them it returns { deals, pagination } like getGames
+  async getDeals(params = {}) {
+    const queryParams = new URLSearchParams();
+    
+    if (params.search) queryParams.append('search', params.search);
+    if (params.discountMin !== undefined) queryParams.append('discountMin', params.discountMin);
+    if (params.priceMin !== undefined) queryParams.append('priceMin', params.priceMin);
+    if (params.priceMax !== undefined) queryParams.append('priceMax', params.priceMax);
+    if (params.currency) queryParams.append('currency', params.currency);
+    if (params.region) queryParams.append('region', params.region);
+    if (params.grade) queryParams.append('grade', params.grade);
+    if (params.forecast) queryParams.append('forecast', params.forecast);
+    if (params.sort) queryParams.append('sort', params.sort);
+    if (params.dropProbabilityMin) queryParams.append('dropProbabilityMin', params.dropProbabilityMin);
+    if (params.page !== undefined) queryParams.append('page', params.page);
+    if (params.perPage !== undefined) queryParams.append('perPage', params.perPage);
+    if (params.after) queryParams.append('after', params.after);
+    if (params.includeTotal) queryParams.append('includeTotal', 'true');
+    
+    const queryString = queryParams.toString();
+    return this.request(`/api/deals${queryString ? `?${queryString}` : ''}`);
   }
 
   async healthCheck() {
@@ -0,0 +1,98 @@
+"""
+Benchmark the batch price outlook on a synthetic catalog.
+
+Generates price intervals shaped like the collector's (a regular price with
+periodic sales and the odd permanent price cut), then times the two steps
+forecast_job.py runs after loading: building the daily matrices and
+computing the outlook. The database load and save are not included.
+
+    python scripts/benchmark_forecast.py --games 10000 --days 730
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'src', 'collectors'))
+
+from forecast_engine import build_daily_grid, compute_forecasts  # noqa: E402
+
+
+def synthetic_intervals(games, days, seed=42):
+    """
+    Price intervals for ``games`` series over ``days`` days.
+
+    Returns:
+        tuple: (series_index, start_day, final_price, discount, daily prices)
+    """
+    rng = np.random.default_rng(seed)
+    day = np.arange(days)
+    base = rng.choice([499, 999, 1499, 1999, 2999, 5999], size=games).astype(np.float64)
+    # A permanent cut somewhere in the window for a third of the catalog
+    cut_day = np.where(rng.random(games) < 0.33, rng.integers(0, days, games), days)
+    base_daily = base[:, None] * np.where(day >= cut_day[:, None], 0.8, 1.0)
+
+    period = rng.integers(30, 121, games)
+    phase = rng.integers(0, 120, games)
+    length = rng.integers(3, 15, games)
+    depth = rng.choice([10, 25, 33, 50, 75], size=games)
+    on_sale = ((day + phase[:, None]) % period[:, None]) < length[:, None]
+    # A quarter of the catalog never goes on sale
+    on_sale &= (rng.random(games) >= 0.25)[:, None]
+
+    discount = np.where(on_sale, depth[:, None], 0).astype(np.float64)
+    prices = np.floor(base_daily * (100 - discount) / 100)
+
+    # One interval per change, like price_history rows
+    changed = np.ones((games, days), dtype=bool)
+    changed[:, 1:] = (prices[:, 1:] != prices[:, :-1]) | (discount[:, 1:] != discount[:, :-1])
+    series_index, start_day = np.nonzero(changed)
+    return series_index, start_day, prices[changed], discount[changed], prices
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the vectorized price outlook on synthetic data")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--horizon-days', type=int, default=14)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per step; the best is reported")
+    args = parser.parse_args()
+
+    series_index, start_day, final_price, discount, expected = synthetic_intervals(args.games, args.days)
+    print(f"{args.games} series x {args.days} days, {len(final_price)} intervals")
+
+    grid_times, compute_times = [], []
+    for _ in range(args.repeat):
+        (price_grid, discount_grid), grid_time = timed(lambda: (
+            build_daily_grid(series_index, start_day, final_price, args.games, args.days),
+            build_daily_grid(series_index, start_day, discount, args.games, args.days),
+        ))
+        outlook, compute_time = timed(compute_forecasts, price_grid, discount_grid,
+                                      horizon_days=args.horizon_days)
+        grid_times.append(grid_time)
+        compute_times.append(compute_time)
+
+    if not np.array_equal(price_grid, expected):
+        print("❌ Rebuilt daily prices do not match the generated ones")
+        return 1
+
+    forecasts, counts = np.unique(outlook['forecast'], return_counts=True)
+    print(f"build daily grids: {min(grid_times):.3f}s")
+    print(f"compute outlook:   {min(compute_times):.3f}s")
+    print(f"total:             {min(grid_times) + min(compute_times):.3f}s "
+          f"({price_grid.nbytes / 2 ** 20:.0f} MB per grid)")
+    print("forecasts: " + ", ".join(f"{name} {count}" for name, count in zip(forecasts, counts)))
+    print(f"mean drop probability: {outlook['drop_probability'].mean():.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
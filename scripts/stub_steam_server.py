@@ -0,0 +1,154 @@
+"""
+Local stand-in for the Steam store endpoints the collectors use.
+
+Serves deterministic fake data so scraping and collection can be run and
+benchmarked offline:
+
+    python scripts/stub_steam_server.py --port 8765 --games 1000 --latency 0.2
+    STEAM_STORE_BASE_URL=http://localhost:8765 \
+        python backend/src/collectors/game_list_manager.py --scrape-only
+
+Endpoints:
+    /search/?filter=topsellers&page=N            full HTML search page
+    /search/results/?start=N&count=M&infinite=1  JSON with results_html
+    /api/appdetails?appids=1,2,3[&cc=..][&filters=...]   appdetails documents (cc: us, gb, de, jp)
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 25
+FIRST_APP_ID = 10
+
+# cc -> (currency, symbol, price multiplier); unknown regions price in USD
+REGION_CURRENCIES = {
+    'us': ('USD', '$', 1.0),
+    'gb': ('GBP', '£', 0.8),
+    'de': ('EUR', '€', 0.92),
+    'jp': ('JPY', '¥', 150.0),
+}
+
+
+def result_row(app_id):
+    """One search result row, shaped like the store's markup"""
+    return (
+        f'<a href="https://store.steampowered.com/app/{app_id}/" '
+        f'data-ds-appid="{app_id}" class="search_result_row ds_collapse_flag">'
+        f'<div class="search_name"><span class="title">Stub Game {app_id}</span></div>'
+        f'<div class="search_price">$19.99</div></a>\n'
+    )
+
+
+def fake_price(app_id, cc='us'):
+    """Stable per-game price that occasionally goes on sale"""
+    currency, symbol, multiplier = REGION_CURRENCIES.get(cc, REGION_CURRENCIES['us'])
+    rng = random.Random(app_id)
+    initial = int(rng.choice([499, 999, 1499, 1999, 2999, 5999]) * multiplier)
+    discount = rng.choice([0, 0, 0, 10, 25, 50, 75])
+    final = initial * (100 - discount) // 100
+    return {
+        'currency': currency,
+        'initial': initial,
+        'final': final,
+        'discount_percent': discount,
+        'initial_formatted': f"{symbol}{initial / 100:.2f}",
+        'final_formatted': f"{symbol}{final / 100:.2f}",
+    }
+
+
+def app_details(app_id, cc='us'):
+    """A trimmed appdetails document; every tenth game is free to play"""
+    is_free = app_id % 10 == 0
+    data = {
+        'type': 'game',
+        'name': f"Stub Game {app_id}",
+        'steam_appid': app_id,
+        'is_free': is_free,
+        'short_description': f"Deterministic stub entry {app_id}.",
+        'header_image': f"https://example.invalid/{app_id}/header.jpg",
+        'developers': ['Stub Studio'],
+        'publishers': ['Stub Publishing'],
+        'platforms': {'windows': True, 'mac': app_id % 3 == 0, 'linux': app_id % 5 == 0},
+        'genres': [{'id': '1', 'description': 'Action'}],
+        'recommendations': {'total': app_id * 7},
+        'release_date': {'coming_soon': False, 'date': '1 Jan, 2020'},
+    }
+    if not is_free:
+        data['price_overview'] = fake_price(app_id, cc)
+    return data
+
+
+class StubSteamHandler(BaseHTTPRequestHandler):
+    games = 1000
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        encoded = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def page_rows(self, start, count):
+        end = min(start + count, self.games)
+        return ''.join(result_row(FIRST_APP_ID + i) for i in range(start, end))
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path.rstrip('/') == '/search/results':
+            start = int(query.get('start', ['0'])[0])
+            count = int(query.get('count', [str(PAGE_SIZE)])[0])
+            body = json.dumps({
+                'success': 1,
+                'results_html': self.page_rows(start, count),
+                'total_count': self.games,
+                'start': start,
+            })
+            self.send_body(body, 'application/json')
+        elif url.path.rstrip('/') == '/search':
+            page = int(query.get('page', ['1'])[0])
+            rows = self.page_rows((page - 1) * PAGE_SIZE, PAGE_SIZE)
+            body = f"<html><body><div id=\"search_resultsRows\">{rows}</div></body></html>"
+            self.send_body(body, 'text/html; charset=utf-8')
+        elif url.path == '/api/appdetails':
+            app_ids = [int(value) for value in query.get('appids', [''])[0].split(',') if value.isdigit()]
+            price_only = query.get('filters', [''])[0] == 'price_overview'
+            cc = query.get('cc', ['us'])[0].lower()
+            result = {}
+            for app_id in app_ids:
+                data = app_details(app_id, cc)
+                if price_only:
+                    data = {'price_overview': data['price_overview']} if 'price_overview' in data else []
+                result[str(app_id)] = {'success': True, 'data': data}
+            self.send_body(json.dumps(result), 'application/json')
+        else:
+            self.send_error(404)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake Steam store responses locally")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--games', type=int, default=1000, help="Games in the top sellers list")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    args = parser.parse_args()
+
+    StubSteamHandler.games = args.games
+    StubSteamHandler.latency = args.latency
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubSteamHandler)
+    print(f"Stub Steam store on http://127.0.0.1:{args.port} ({args.games} games, {args.latency}s latency)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass